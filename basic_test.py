@@ -5,6 +5,7 @@
 import sys
 import os
 import time
+from importlib import import_module
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -24,8 +25,7 @@ def test_imports():
     success_count = 0
     for module_name, class_name in modules_to_test:
         try:
-            module = __import__(module_name)
-            cls = getattr(module, class_name)
+            cls = getattr(import_module(module_name), class_name)
             print(f"[OK] {module_name}.{class_name} 导入成功")
             success_count += 1
         except Exception as e:
@@ -133,6 +133,15 @@ def test_time_manager():
         time_str = formatter.format_time(0)
         print(f"[OK] 时间格式化: {time_str}")
         
+        # 测试批量格式化与逐个格式化结果一致
+        values = [0, 3.5, 8, 20]
+        if (formatter.format_times(values) == [formatter.format_time(v) for v in values] and
+                formatter.format_durations(values) == [formatter.format_duration(v) for v in values]):
+            print("[OK] 批量时间格式化正确")
+        else:
+            print("[FAIL] 批量时间格式化结果不一致")
+            return False
+        
         return True
         
     except Exception as e:
@@ -158,10 +167,9 @@ def test_architecture():
             'scheduler_config.json'
         ]
         
-        missing_files = []
-        for filename in required_files:
-            if not os.path.exists(filename):
-                missing_files.append(filename)
+        with os.scandir('.') as entries:
+            present_files = {entry.name for entry in entries}
+        missing_files = [filename for filename in required_files if filename not in present_files]
         
         if missing_files:
             print(f"[FAIL] 缺少文件: {missing_files}")
@@ -170,9 +178,8 @@ def test_architecture():
             print(f"[OK] 所有核心文件存在 ({len(required_files)} 个)")
         
         # 测试配置文件格式
-        import json
-        with open('scheduler_config.json', 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
+        from config import load_json_file
+        config_data = load_json_file('scheduler_config.json')
         
         required_config_sections = ['priority_weights', 'working_time', 'scheduling', 'output']
         for section in required_config_sections:
@@ -183,8 +190,7 @@ def test_architecture():
         print("[OK] 配置文件格式正确")
         
         # 测试数据文件格式
-        with open('test_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file('test_data.json')
         
         if 'test_items' in data and 'instruments' in data:
             print(f"[OK] 数据文件格式正确 (测试项: {len(data['test_items'])})")
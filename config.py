@@ -2,13 +2,51 @@
 测试调度系统配置管理模块
 负责管理所有可配置参数，避免硬编码
 """
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Any, FrozenSet
 import json
 import os
 
+from models import _SLOTS
 
-@dataclass
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时回退到标准库json
+    orjson = None
+
+
+def load_json_file(path: str) -> Any:
+    """以二进制方式读取并解析JSON文件（优先使用orjson）"""
+    with open(path, 'rb') as f:
+        buf = f.read()
+    if orjson is not None:
+        return orjson.loads(buf)
+    return json.loads(buf)
+
+
+def dump_json_file(path: str, data: Any):
+    """以二进制方式写出缩进为2的UTF-8 JSON文件（优先使用orjson）"""
+    if orjson is not None:
+        buf = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        buf = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(buf)
+
+
+# 各配置类的字段名缓存
+_FIELD_NAMES: Dict[type, FrozenSet[str]] = {}
+
+
+def _field_names(cls) -> FrozenSet[str]:
+    """获取dataclass的字段名集合（按类缓存）"""
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = frozenset(f.name for f in fields(cls))
+    return names
+
+
+@dataclass(**_SLOTS)
 class PriorityWeights:
     """优先级权重配置"""
     dependency: int = 10      # 依赖关系权重
@@ -19,7 +57,7 @@ class PriorityWeights:
     group_phase_boost: int = 450  # 组-阶段优先级最大加分
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class WorkingTimeConfig:
     """工作时间配置"""
     hours_per_day: int = 8           # 每天工作小时数
@@ -28,7 +66,7 @@ class WorkingTimeConfig:
     short_test_threshold: int = 8    # 短测试项阈值（小时）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SchedulingConfig:
     """调度配置"""
     max_parallel: int = 3            # 最大并行测试数
@@ -37,7 +75,7 @@ class SchedulingConfig:
     time_limit_hours: int = None     # 时间限制（None表示无限制）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class OutputConfig:
     """输出配置"""
     excel_filename: str = "test_schedule_result.xlsx"
@@ -62,8 +100,7 @@ class ConfigManager:
     def load_from_file(self, config_file: str):
         """从JSON文件加载配置"""
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            config_data = load_json_file(config_file)
             
             # 更新各个配置段
             if 'priority_weights' in config_data:
@@ -91,18 +128,18 @@ class ConfigManager:
             'output': self._dataclass_to_dict(self.output)
         }
         
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, ensure_ascii=False, indent=2)
+        dump_json_file(config_file, config_data)
     
     def _update_dataclass(self, obj, data: Dict[str, Any]):
         """更新dataclass对象的字段"""
+        names = _field_names(type(obj))
         for key, value in data.items():
-            if hasattr(obj, key):
+            if key in names:
                 setattr(obj, key, value)
     
     def _dataclass_to_dict(self, obj) -> Dict[str, Any]:
         """将dataclass转换为字典"""
-        return {field.name: getattr(obj, field.name) for field in obj.__dataclass_fields__.values()}
+        return asdict(obj)
     
     def validate(self) -> bool:
         """验证配置有效性"""
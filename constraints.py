@@ -2,39 +2,53 @@
 约束检查模块
 负责检查各种调度约束：资源约束、依赖关系、阶段约束、测试组约束等
 """
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Optional
 import numpy as np
 import re
 from models import TestItem, ScheduledTest, DependencyGraph, GroupPhase, SchedulingState
 from config import SchedulingConfig
 
 
+# 资源需求格式："仪器名×数量"，多项之间以逗号分隔
+_REQ_RE = re.compile(r'([^,×]+?)×(\d+)')
+
+
 class ResourceMatrix:
     """资源需求矩阵管理器"""
     
     def __init__(self, test_items: List[TestItem], instruments: Dict[str, int]):
         self.test_items = test_items
         self.instruments = instruments
-        self.instrument_names = list(instruments.keys())
+        self.instrument_names = tuple(instruments.keys())
+        self._name_to_col = {name: j for j, name in enumerate(self.instrument_names)}
         self.matrix = self._create_resource_matrix()
+        # 每个测试项的仪器需求总数（优先级计算使用），构建时一次性求和
+        self.row_sums = self.matrix.sum(axis=1, dtype=np.int64)
+        # 仪器数量向量，资源检查只需与其比较而无需查字典
+        self.capacities = np.fromiter((instruments[name] for name in self.instrument_names),
+                                      dtype=np.int32, count=len(self.instrument_names))
     
     def _create_resource_matrix(self) -> np.ndarray:
         """创建资源需求矩阵"""
         n_tests = len(self.test_items)
         n_instruments = len(self.instrument_names)
-        matrix = np.zeros((n_tests, n_instruments))
+        matrix = np.zeros((n_tests, n_instruments), dtype=np.int32)
         
+        # 先收集 (行, 列, 数量) 三元组，再一次性写入矩阵
+        rows, cols, quantities = [], [], []
+        name_to_col = self._name_to_col
         for i, test_item in enumerate(self.test_items):
-            if test_item.required_instruments and test_item.required_instruments != '无':
-                for item in test_item.required_instruments.split(','):
-                    item = item.strip()
-                    match = re.match(r'(.*?)×(\d+)', item)
-                    if match:
-                        resource_name = match.group(1).strip()
-                        quantity = int(match.group(2))
-                        if resource_name in self.instrument_names:
-                            j = self.instrument_names.index(resource_name)
-                            matrix[i][j] = quantity
+            required_instruments = test_item.required_instruments
+            if required_instruments and required_instruments != '无' and '×' in required_instruments:
+                for match in _REQ_RE.finditer(required_instruments):
+                    j = name_to_col.get(match.group(1).strip())
+                    if j is not None:
+                        rows.append(i)
+                        cols.append(j)
+                        quantities.append(int(match.group(2)))
+        
+        if rows:
+            matrix[rows, cols] = quantities
         
         return matrix
     
@@ -43,13 +57,10 @@ class ResourceMatrix:
         if test_idx >= len(self.test_items):
             return {}
         
-        usage = {}
-        for j, instrument_name in enumerate(self.instrument_names):
-            required = int(self.matrix[test_idx][j])
-            if required > 0:
-                usage[instrument_name] = required
-        
-        return usage
+        # 取出整行后只遍历需求大于0的列
+        row = self.matrix[test_idx]
+        instrument_names = self.instrument_names
+        return {instrument_names[j]: int(row[j]) for j in np.flatnonzero(row > 0).tolist()}
 
 
 class ConstraintChecker:
@@ -63,22 +74,61 @@ class ConstraintChecker:
         self.config = config
         self.resource_matrix = ResourceMatrix(test_items, instruments)
         
+        # 资源检查复用的缓冲区，避免每次调用重新分配
+        n_instruments = len(self.resource_matrix.instrument_names)
+        self._scratch_usage = np.zeros(n_instruments, dtype=np.int32)
+        self._scratch_exceeded = np.zeros(n_instruments, dtype=bool)
+        
         # 创建测试项索引映射
         self.test_id_to_index = {item.test_id: i for i, item in enumerate(test_items)}
         
+        # 按索引缓存测试组和阶段，避免在约束检查中反复查找
+        self.group_of_idx = [item.test_group for item in test_items]
+        self.phase_of_idx = [item.test_phase for item in test_items]
+        
+        # 测试组位图：第i位表示测试项索引i属于该组；按阶段再细分组位图
+        self.group_mask: Dict[str, int] = {}
+        self.phase_group_masks: Dict[str, Dict[str, int]] = {}
+        for i, item in enumerate(test_items):
+            if item.test_group and item.test_group != '无':
+                bit = 1 << i
+                self.group_mask[item.test_group] = self.group_mask.get(item.test_group, 0) | bit
+                phase_groups = self.phase_group_masks.setdefault(item.test_phase, {})
+                phase_groups[item.test_group] = phase_groups.get(item.test_group, 0) | bit
+        
+        # 测试组整数编号（无测试组为-1），用于批量约束检查
+        group_ids = {group: k for k, group in enumerate(self.group_mask)}
+        self.group_id_of_idx = np.array(
+            [group_ids.get(group, -1) for group in self.group_of_idx], dtype=np.int32
+        )
+        
         # 按阶段分组测试项
         self.phase_to_tests = self._group_tests_by_phase()
         self.phase_order = self._determine_phase_order()
+        
+        # 预计算每个测试项的阶段位置，以及各阶段之前所有阶段的测试项ID集合
+        self.phase_idx = {phase: i for i, phase in enumerate(self.phase_order)}
+        self.test_phase_pos = [self.phase_idx.get(item.test_phase, -1) for item in test_items]
+        self.phase_test_ids = [
+            frozenset(test_items[i].test_id for i in self.phase_to_tests[phase].tolist())
+            for phase in self.phase_order
+        ]
+        self.prior_phase_test_ids = []
+        prior_ids = frozenset()
+        for ids in self.phase_test_ids:
+            self.prior_phase_test_ids.append(prior_ids)
+            prior_ids = prior_ids | ids
+        self.test_phase_pos_array = np.array(self.test_phase_pos, dtype=np.int32)
     
-    def _group_tests_by_phase(self) -> Dict[str, List[int]]:
-        """按阶段分组测试项"""
+    def _group_tests_by_phase(self) -> Dict[str, np.ndarray]:
+        """按阶段分组测试项（值为测试项索引数组）"""
         phase_groups = {}
         for i, test_item in enumerate(self.test_items):
             phase = test_item.test_phase
             if phase not in phase_groups:
                 phase_groups[phase] = []
             phase_groups[phase].append(i)
-        return phase_groups
+        return {phase: np.array(indices, dtype=np.int32) for phase, indices in phase_groups.items()}
     
     def _determine_phase_order(self) -> List[str]:
         """确定阶段顺序"""
@@ -97,15 +147,23 @@ class ConstraintChecker:
         actual_phases = set(self.phase_to_tests.keys())
         return [phase for phase in preferred_order if phase in actual_phases]
     
+    def _index_of(self, test: ScheduledTest):
+        """获取已调度测试项对应的测试项索引"""
+        if test.test_idx is not None:
+            return test.test_idx
+        return self.test_id_to_index.get(test.test_id)
+    
     def check_resource_constraint(self, test_idx: int, current_time: float, 
-                                active_tests: List[ScheduledTest]) -> Tuple[bool, str]:
+                                active_tests: List[ScheduledTest],
+                                active_usage: np.ndarray = None) -> Tuple[bool, str]:
         """
         检查资源约束
         
         Args:
             test_idx: 测试项索引
             current_time: 当前时间
-            active_tests: 当前活跃的测试项
+            active_tests: 当前活跃的测试项（调用方在推进时间时已剔除已完成项）
+            active_usage: 增量维护的活跃资源占用（可选，提供时不再逐项累计）
             
         Returns:
             Tuple[bool, str]: (是否满足约束, 原因)
@@ -113,31 +171,34 @@ class ConstraintChecker:
         if test_idx >= len(self.test_items):
             return False, "测试项索引超出范围"
         
-        # 计算当前资源使用情况
-        current_usage = {}
-        for instrument_name in self.instruments.keys():
-            current_usage[instrument_name] = 0
-        
-        # 累计活跃测试的资源使用
-        for test in active_tests:
-            if test.start_time <= current_time < test.end_time:
-                test_index = self.test_id_to_index.get(test.test_id)
-                if test_index is not None:
-                    for j, instrument_name in enumerate(self.resource_matrix.instrument_names):
-                        current_usage[instrument_name] += int(self.resource_matrix.matrix[test_index][j])
-        
-        # 检查新测试项的资源需求
-        for j, instrument_name in enumerate(self.resource_matrix.instrument_names):
-            required = int(self.resource_matrix.matrix[test_idx][j])
-            available = self.instruments[instrument_name]
-            
-            if current_usage[instrument_name] + required > available:
-                return False, f"仪器 {instrument_name} 资源不足 (需要{required}, 可用{available - current_usage[instrument_name]})"
+        # 在复用的缓冲区中累计：活跃测试的资源使用 + 新测试项的资源需求
+        matrix = self.resource_matrix.matrix
+        required = matrix[test_idx]
+        total_usage = self._scratch_usage
+        if active_usage is not None:
+            np.add(active_usage, required, out=total_usage)
+        else:
+            total_usage.fill(0)
+            for test in active_tests:
+                index = self._index_of(test)
+                if index is not None:
+                    total_usage += matrix[index]
+            total_usage += required
+        
+        # 检查是否超出仪器数量
+        exceeded = np.greater(total_usage, self.resource_matrix.capacities, out=self._scratch_exceeded)
+        if exceeded.any():
+            j = int(np.argmax(exceeded))
+            instrument_name = self.resource_matrix.instrument_names[j]
+            available = int(self.resource_matrix.capacities[j])
+            used = int(total_usage[j]) - int(required[j])
+            return False, f"仪器 {instrument_name} 资源不足 (需要{int(required[j])}, 可用{available - used})"
         
         return True, "资源约束满足"
     
     def check_dependency_constraint(self, test_idx: int, current_time: float, 
-                                  scheduled_tests: List[ScheduledTest]) -> Tuple[bool, str]:
+                                  scheduled_tests: List[ScheduledTest],
+                                  end_time_by_idx: Optional[np.ndarray] = None) -> Tuple[bool, str]:
         """
         检查依赖关系约束
         
@@ -145,18 +206,27 @@ class ConstraintChecker:
             test_idx: 测试项索引
             current_time: 当前时间
             scheduled_tests: 已调度的测试项
+            end_time_by_idx: 增量维护的各测试项结束时间（可选，未提供时由scheduled_tests推导）
             
         Returns:
             Tuple[bool, str]: (是否满足约束, 原因)
         """
-        if not self.dependency_graph.check_dependencies_satisfied(test_idx, scheduled_tests, current_time):
+        if end_time_by_idx is None:
+            end_time_by_idx = np.full(len(self.test_items), np.inf)
+            for test in scheduled_tests:
+                index = self._index_of(test)
+                if index is not None:
+                    end_time_by_idx[index] = min(end_time_by_idx[index], test.end_time)
+        
+        if not self.dependency_graph.check_dependencies_satisfied(test_idx, end_time_by_idx, current_time):
             test_item = self.test_items[test_idx]
             return False, f"测试项 {test_item.test_item} 的依赖关系未满足"
         
         return True, "依赖关系约束满足"
     
     def check_phase_constraint(self, test_idx: int, current_time: float, 
-                             scheduled_tests: List[ScheduledTest]) -> Tuple[bool, str]:
+                             scheduled_tests: List[ScheduledTest],
+                             completed_ids: Set[int] = None) -> Tuple[bool, str]:
         """
         检查阶段约束（前面阶段必须完成）
         
@@ -164,6 +234,7 @@ class ConstraintChecker:
             test_idx: 测试项索引
             current_time: 当前时间
             scheduled_tests: 已调度的测试项
+            completed_ids: 已完成的测试项ID集合（可选，未提供时由scheduled_tests推导）
             
         Returns:
             Tuple[bool, str]: (是否满足约束, 原因)
@@ -171,41 +242,36 @@ class ConstraintChecker:
         if test_idx >= len(self.test_items):
             return False, "测试项索引超出范围"
         
-        test_phase = self.test_items[test_idx].test_phase
-        
         # 获取当前阶段在顺序中的位置
-        if test_phase not in self.phase_order:
+        current_phase_idx = self.test_phase_pos[test_idx]
+        if current_phase_idx < 0:
             return True, "未知阶段，跳过阶段约束检查"
         
-        current_phase_idx = self.phase_order.index(test_phase)
+        if completed_ids is None:
+            completed_ids = {test.test_id for test in scheduled_tests if test.end_time <= current_time}
+        
+        # 前面所有阶段的测试项都已完成
+        if self.prior_phase_test_ids[current_phase_idx] <= completed_ids:
+            return True, "阶段约束满足"
         
-        # 检查前面所有阶段是否都已完成
+        # 找出第一个未完成的前置阶段
         for prev_phase_idx in range(current_phase_idx):
-            prev_phase = self.phase_order[prev_phase_idx]
-            prev_phase_tests = self.phase_to_tests.get(prev_phase, [])
-            
-            # 检查前一阶段的测试项是否都已经被调度且完成
-            for prev_test_idx in prev_phase_tests:
-                prev_test_id = self.test_items[prev_test_idx].test_id
-                prev_test = next(
-                    (test for test in scheduled_tests if test.test_id == prev_test_id),
-                    None
-                )
-                if not prev_test or prev_test.end_time > current_time:
-                    prev_phase_name = prev_phase
-                    return False, f"前置阶段 '{prev_phase_name}' 未完成"
+            if not self.phase_test_ids[prev_phase_idx] <= completed_ids:
+                return False, f"前置阶段 '{self.phase_order[prev_phase_idx]}' 未完成"
         
         return True, "阶段约束满足"
     
     def check_group_constraint(self, test_idx: int, current_time: float, 
-                             active_tests: List[ScheduledTest]) -> Tuple[bool, str]:
+                             active_tests: List[ScheduledTest],
+                             active_bits: int = None) -> Tuple[bool, str]:
         """
         检查测试组约束（同组测试项不能同时进行）
         
         Args:
             test_idx: 测试项索引
             current_time: 当前时间
-            active_tests: 当前活跃的测试项
+            active_tests: 当前活跃的测试项（调用方在推进时间时已剔除已完成项）
+            active_bits: 活跃测试项位图（可选，提供时以位运算代替逐项比较）
             
         Returns:
             Tuple[bool, str]: (是否满足约束, 原因)
@@ -213,20 +279,23 @@ class ConstraintChecker:
         if test_idx >= len(self.test_items):
             return False, "测试项索引超出范围"
         
-        test_group = self.test_items[test_idx].test_group
+        group_of_idx = self.group_of_idx
+        test_group = group_of_idx[test_idx]
         
         # 如果没有测试组，跳过约束检查
         if not test_group or test_group == '无':
             return True, "无测试组，跳过组约束检查"
         
+        if active_bits is not None:
+            if active_bits & self.group_mask[test_group]:
+                return False, f"测试组 '{test_group}' 已有测试项在进行中"
+            return True, "测试组约束满足"
+        
         # 检查是否有同组的测试项正在进行
         for test in active_tests:
-            if test.start_time <= current_time < test.end_time:
-                test_index = self.test_id_to_index.get(test.test_id)
-                if test_index is not None:
-                    active_test_group = self.test_items[test_index].test_group
-                    if active_test_group == test_group:
-                        return False, f"测试组 '{test_group}' 已有测试项在进行中"
+            test_index = self._index_of(test)
+            if test_index is not None and group_of_idx[test_index] == test_group:
+                return False, f"测试组 '{test_group}' 已有测试项在进行中"
         
         return True, "测试组约束满足"
     
@@ -246,14 +315,16 @@ class ConstraintChecker:
         return True, "并行度约束满足"
     
     def check_phase_parallel_constraint(self, test_idx: int, current_time: float,
-                                      active_tests: List[ScheduledTest]) -> Tuple[bool, str]:
+                                      active_tests: List[ScheduledTest],
+                                      active_bits: int = None) -> Tuple[bool, str]:
         """
         检查阶段并行度约束（每个阶段最多允许指定数量的测试组并行）
         
         Args:
             test_idx: 测试项索引
             current_time: 当前时间
-            active_tests: 当前活跃的测试项
+            active_tests: 当前活跃的测试项（调用方在推进时间时已剔除已完成项）
+            active_bits: 活跃测试项位图（可选，提供时以位运算统计活跃组）
             
         Returns:
             Tuple[bool, str]: (是否满足约束, 原因)
@@ -261,21 +332,28 @@ class ConstraintChecker:
         if test_idx >= len(self.test_items):
             return False, "测试项索引超出范围"
         
-        test_phase = self.test_items[test_idx].test_phase
-        test_group = self.test_items[test_idx].test_group
+        group_of_idx = self.group_of_idx
+        test_phase = self.phase_of_idx[test_idx]
+        test_group = group_of_idx[test_idx]
         
         if not test_group or test_group == '无':
             return True, "无测试组，跳过阶段并行约束检查"
         
         # 统计当前阶段活跃的测试组数量
-        active_groups_in_phase = set()
-        for test in active_tests:
-            if test.start_time <= current_time < test.end_time and test.test_phase == test_phase:
-                test_index = self.test_id_to_index.get(test.test_id)
-                if test_index is not None:
-                    active_test_group = self.test_items[test_index].test_group
-                    if active_test_group and active_test_group != '无':
-                        active_groups_in_phase.add(active_test_group)
+        if active_bits is not None:
+            active_groups_in_phase = {
+                group for group, mask in self.phase_group_masks[test_phase].items()
+                if active_bits & mask
+            }
+        else:
+            active_groups_in_phase = set()
+            for test in active_tests:
+                if test.test_phase == test_phase:
+                    test_index = self._index_of(test)
+                    if test_index is not None:
+                        active_test_group = group_of_idx[test_index]
+                        if active_test_group and active_test_group != '无':
+                            active_groups_in_phase.add(active_test_group)
         
         # 如果当前组已经在活跃组中，允许添加
         if test_group in active_groups_in_phase:
@@ -287,15 +365,89 @@ class ConstraintChecker:
         
         return True, "阶段并行约束满足"
     
+    def feasible_mask(self, candidate_idx: np.ndarray, state: SchedulingState) -> np.ndarray:
+        """
+        批量检查候选测试项在当前状态下是否可能满足约束
+        
+        一次性对所有候选项计算并行度、测试组、资源、阶段和依赖关系约束。在同一时间点内
+        继续调度其他测试只会使这些约束更难满足，因此被判定为不可行的候选项可直接
+        跳过；判定为可行的候选项仍需通过 check_all_constraints 的完整检查。
+        
+        Args:
+            candidate_idx: 候选测试项索引数组
+            state: 调度状态
+            
+        Returns:
+            np.ndarray: 布尔数组，True表示该候选项可能满足约束
+        """
+        candidate_idx = np.asarray(candidate_idx, dtype=np.intp)
+        if len(state.active_tests) >= self.config.max_parallel:
+            return np.zeros(len(candidate_idx), dtype=bool)
+        
+        active_indices = [index for index in map(self._index_of, state.active_tests) if index is not None]
+        
+        # 资源约束：活跃占用 + 候选项需求 <= 仪器数量
+        matrix = self.resource_matrix.matrix
+        active_usage = state.complete_active_usage
+        if active_usage is None:
+            active_usage = matrix[active_indices].sum(axis=0)
+        mask = ((matrix[candidate_idx] + active_usage) <= self.resource_matrix.capacities).all(axis=1)
+        
+        # 测试组约束：候选项所在测试组不能已有测试在进行
+        if active_indices:
+            active_group_ids = self.group_id_of_idx[active_indices]
+            candidate_groups = self.group_id_of_idx[candidate_idx]
+            mask &= (candidate_groups < 0) | ~np.isin(candidate_groups, active_group_ids)
+        
+        # 阶段约束：前面所有阶段都已完成
+        if self.phase_order:
+            completed_ids = state.completed_ids
+            phase_ready = np.array(
+                [prior_ids <= completed_ids for prior_ids in self.prior_phase_test_ids] + [True]
+            )
+            # 未知阶段（-1）映射到末尾的True
+            mask &= phase_ready[self.test_phase_pos_array[candidate_idx]]
+        
+        # 依赖关系约束：所有前置测试项都已完成
+        if state.completed_mask is not None:
+            mask &= self.deps_ok_mask(candidate_idx, state.completed_mask)
+        
+        return mask
+    
+    def deps_ok_mask(self, candidate_idx: np.ndarray, completed_mask: np.ndarray) -> np.ndarray:
+        """
+        批量检查候选测试项的依赖关系是否满足
+        
+        Args:
+            candidate_idx: 候选测试项索引数组
+            completed_mask: 已完成测试项掩码（按测试项索引）
+            
+        Returns:
+            np.ndarray: 布尔数组，True表示该候选项的依赖都已完成
+        """
+        graph = self.dependency_graph
+        if graph.unresolved_mask is None or not len(graph.unresolved_mask):
+            return np.ones(len(candidate_idx), dtype=bool)
+        
+        # 按依赖边一次性找出前置项未完成的测试项，代价为O(边数)而非O(候选数×测试项数)
+        blocked = graph.unresolved_mask.copy()
+        blocked[graph.prereq_src[~completed_mask[graph.prereq_dst]]] = True
+        return ~blocked[candidate_idx]
+    
     def check_all_constraints(self, test_idx: int, current_time: float, 
-                            state: SchedulingState) -> Tuple[bool, List[str]]:
+                            state: SchedulingState,
+                            collect_reasons: bool = False) -> Tuple[bool, List[str]]:
         """
         检查所有约束
         
+        约束按检查代价从低到高依次执行；默认在第一个不满足的约束处返回，
+        只有 collect_reasons=True 时才会检查全部约束并汇总所有原因。
+        
         Args:
             test_idx: 测试项索引
             current_time: 当前时间
             state: 调度状态
+            collect_reasons: 是否收集全部不满足的约束原因
             
         Returns:
             Tuple[bool, List[str]]: (是否满足所有约束, 不满足的约束原因列表)
@@ -306,30 +458,45 @@ class ConstraintChecker:
         satisfied, reason = self.check_parallel_constraint(len(state.active_tests))
         if not satisfied:
             failed_constraints.append(reason)
+            if not collect_reasons:
+                return False, failed_constraints
         
-        # 检查资源约束
-        satisfied, reason = self.check_resource_constraint(test_idx, current_time, state.active_tests)
+        # 检查测试组约束
+        satisfied, reason = self.check_group_constraint(test_idx, current_time, state.active_tests,
+                                                        state.complete_active_bits)
         if not satisfied:
             failed_constraints.append(reason)
+            if not collect_reasons:
+                return False, failed_constraints
         
-        # 检查依赖关系约束
-        satisfied, reason = self.check_dependency_constraint(test_idx, current_time, state.scheduled_tests)
+        # 检查阶段并行约束
+        satisfied, reason = self.check_phase_parallel_constraint(test_idx, current_time, state.active_tests,
+                                                                 state.complete_active_bits)
         if not satisfied:
             failed_constraints.append(reason)
+            if not collect_reasons:
+                return False, failed_constraints
         
-        # 检查阶段约束
-        satisfied, reason = self.check_phase_constraint(test_idx, current_time, state.scheduled_tests)
+        # 检查资源约束
+        satisfied, reason = self.check_resource_constraint(test_idx, current_time, state.active_tests,
+                                                           state.complete_active_usage)
         if not satisfied:
             failed_constraints.append(reason)
+            if not collect_reasons:
+                return False, failed_constraints
         
-        # 检查测试组约束
-        satisfied, reason = self.check_group_constraint(test_idx, current_time, state.active_tests)
+        # 检查阶段约束
+        satisfied, reason = self.check_phase_constraint(test_idx, current_time, state.scheduled_tests,
+                                                        state.completed_ids)
         if not satisfied:
             failed_constraints.append(reason)
+            if not collect_reasons:
+                return False, failed_constraints
         
-        # 检查阶段并行约束
-        satisfied, reason = self.check_phase_parallel_constraint(test_idx, current_time, state.active_tests)
+        # 检查依赖关系约束
+        satisfied, reason = self.check_dependency_constraint(test_idx, current_time, state.scheduled_tests,
+                                                        state.end_time_by_idx)
         if not satisfied:
             failed_constraints.append(reason)
         
-        return len(failed_constraints) == 0, failed_constraints
\ No newline at end of file
+        return len(failed_constraints) == 0, failed_constraints
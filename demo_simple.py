@@ -8,10 +8,11 @@ import os
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from test_scheduler_refactored import TestScheduler
-
 
 def main():
+    # 延迟导入调度器（依赖pandas等重型库），仅导入本模块时不产生开销
+    from test_scheduler_refactored import TestScheduler
+    
     print("="*60)
     print("重构后测试调度系统演示")
     print("="*60)
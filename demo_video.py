@@ -6,11 +6,11 @@
 """
 
 import json
-from sequence_scheduler import SequenceScheduler
-from test_scheduler_refactored import TestScheduler
 
 def demo_sequence_scheduling():
     """演示序列调度模式"""
+    from sequence_scheduler import SequenceScheduler
+    
     print("=" * 60)
     print("[序列调度模式] 测试调度系统演示")
     print("=" * 60)
@@ -55,6 +55,8 @@ def demo_sequence_scheduling():
 
 def demo_time_scheduling():
     """演示时间调度模式"""
+    from test_scheduler_refactored import TestScheduler
+    
     print("\n" + "=" * 60)
     print("🚀 测试调度系统演示 - 时间调度模式") 
     print("=" * 60)
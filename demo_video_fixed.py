@@ -6,11 +6,11 @@
 
 import json
 import sys
-from sequence_scheduler import SequenceScheduler
-from test_scheduler_refactored import TestScheduler
 
 def demo_sequence_scheduling():
     """演示序列调度模式"""
+    from sequence_scheduler import SequenceScheduler
+    
     print("=" * 60)
     print("[SEQUENCE MODE] Test Scheduling System Demo")
     print("=" * 60)
@@ -55,6 +55,8 @@ def demo_sequence_scheduling():
 
 def demo_time_scheduling():
     """演示时间调度模式"""
+    from test_scheduler_refactored import TestScheduler
+    
     print("\n" + "=" * 60)
     print("[TIME MODE] Test Scheduling System Demo") 
     print("=" * 60)
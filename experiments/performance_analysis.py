@@ -7,19 +7,27 @@ Performance Analysis for Academic Paper
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 import time
-import json
 from typing import List, Dict, Tuple
 import os
 import sys
+import csv
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib as mpl
+
+# 无图形界面时使用Agg后端，只保存图片而不弹出窗口
+INTERACTIVE = bool(os.environ.get('DISPLAY')) or sys.platform in ('win32', 'darwin')
+if not INTERACTIVE:
+    mpl.use('Agg')
+import matplotlib.pyplot as plt
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from test_scheduler_refactored import TestScheduler
 from sequence_scheduler import SequenceScheduler
+from config import dump_json_file
+from output_formatter import display_width
 
 # 设置中文字体
 mpl.rcParams['font.sans-serif'] = ['SimHei']  # 用黑体显示中文
@@ -28,9 +36,25 @@ mpl.rcParams['axes.unicode_minus'] = False    # 正常显示负号
 class AcademicExperiment:
     """学术论文实验类"""
     
+    CHART_DPI = 300  # 图表保存分辨率
+    
     def __init__(self):
         self.results = []
         self.performance_data = []
+        self.rng = np.random.default_rng()
+    
+    def _new_chart(self, figsize: Tuple[float, float], nrows: int = 1, ncols: int = 1):
+        """创建图表"""
+        return plt.subplots(nrows, ncols, figsize=figsize)
+    
+    def _save_chart(self, fig, filename: str):
+        """保存图表，仅在交互模式下显示，否则保存后关闭"""
+        fig.tight_layout()
+        fig.savefig(filename, dpi=self.CHART_DPI, bbox_inches='tight')
+        if INTERACTIVE:
+            plt.show()
+        else:
+            plt.close(fig)
         
     def generate_test_dataset(self, size: str) -> Dict:
         """生成不同规模的测试数据集"""
@@ -65,37 +89,43 @@ class AcademicExperiment:
         groups = ["基础功能", "性能测试", "接口测试", "安全测试", "用户验收"]
         instruments = [f"仪器{i}" for i in range(1, config['instrument_count'] + 1)]
         
-        # 生成测试项目
-        for i in range(1, config['test_count'] + 1):
-            test_item = {
-                "test_id": i,
-                "test_phase": np.random.choice(phases),
-                "test_group": np.random.choice(groups),
-                "test_item": f"测试项目{i}",
-                "required_equipment": np.random.choice(["测试台", "服务器", "网络设备", "无"]),
-                "required_instruments": np.random.choice(instruments + ["无"]),
-                "duration": np.random.randint(1, 8)
+        n = config['test_count']
+        rng = self.rng
+        
+        # 按列一次性批量采样，再组装测试项目
+        phase_arr = rng.choice(phases, size=n).tolist()
+        group_arr = rng.choice(groups, size=n).tolist()
+        equipment_arr = rng.choice(["测试台", "服务器", "网络设备", "无"], size=n).tolist()
+        instrument_arr = rng.choice(instruments + ["无"], size=n).tolist()
+        duration_arr = rng.integers(1, 8, size=n).tolist()
+        test_items = [
+            {
+                "test_id": i + 1,
+                "test_phase": phase_arr[i],
+                "test_group": group_arr[i],
+                "test_item": f"测试项目{i + 1}",
+                "required_equipment": equipment_arr[i],
+                "required_instruments": instrument_arr[i],
+                "duration": duration_arr[i]
             }
-            test_items.append(test_item)
+            for i in range(n)
+        ]
         
-        # 生成依赖关系
-        dependencies = {}
-        dependency_count = min(config['dependency_count'], config['test_count'] // 2)
+        # 生成依赖关系：批量采样 (依赖方, 前置项) 编号对，剔除自环后排序去重
+        dependency_count = min(config['dependency_count'], n // 2)
         
-        for _ in range(dependency_count):
-            dependent = f"测试项目{np.random.randint(1, config['test_count'] + 1)}"
-            prerequisite = f"测试项目{np.random.randint(1, config['test_count'] + 1)}"
-            
-            if dependent != prerequisite:
-                if dependent not in dependencies:
-                    dependencies[dependent] = []
-                if prerequisite not in dependencies[dependent]:
-                    dependencies[dependent].append(prerequisite)
+        pairs = rng.integers(1, n + 1, size=(dependency_count, 2))
+        pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+        
+        # 按依赖方切分前置项（unique结果已按依赖方有序）
+        dependents, starts = np.unique(pairs[:, 0], return_index=True)
+        dependencies = {
+            f"测试项目{dependent_id}": [f"测试项目{prerequisite_id}" for prerequisite_id in prerequisites.tolist()]
+            for dependent_id, prerequisites in zip(dependents.tolist(), np.split(pairs[:, 1], starts[1:]))
+        }
         
         # 生成仪器配置
-        instrument_config = {}
-        for instrument in instruments:
-            instrument_config[instrument] = np.random.randint(1, 4)
+        instrument_config = dict(zip(instruments, rng.integers(1, 4, size=len(instruments)).tolist()))
             
         return {
             "test_items": test_items,
@@ -115,16 +145,17 @@ class AcademicExperiment:
             # 生成测试数据
             dataset = self.generate_test_dataset(size)
             
-            # 保存数据集到文件
-            data_file = f"test_data_{size}.json"
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(dataset, f, ensure_ascii=False, indent=2)
+            # 两个调度器直接使用内存中的数据集；仅在设置KEEP_ARTIFACTS=1时保存到文件
+            if os.environ.get('KEEP_ARTIFACTS') == '1':
+                dump_json_file(f"test_data_{size}.json", dataset)
             
             # 测试时间调度
             time_scheduler = TestScheduler('scheduler_config.json')
             start_time = time.time()
             try:
-                time_scheduler.load_data_from_file(data_file)
+                time_scheduler.load_data_from_dict(
+                    dataset['test_items'], dataset['instruments'], dataset['dependencies']
+                )
                 time_result = time_scheduler.solve_schedule()
                 time_duration = time.time() - start_time
                 time_success = time_result.success if hasattr(time_result, 'success') else True
@@ -137,7 +168,9 @@ class AcademicExperiment:
             seq_scheduler = SequenceScheduler('scheduler_config.json')
             start_time = time.time()
             try:
-                seq_scheduler.load_data_from_file(data_file)
+                seq_scheduler.load_data_from_dict(
+                    dataset['test_items'], dataset['instruments'], dataset['dependencies']
+                )
                 seq_result = seq_scheduler.generate_sequence()
                 seq_duration = time.time() - start_time
                 seq_success = seq_result is not None
@@ -164,14 +197,10 @@ class AcademicExperiment:
             }
             
             results.append(result)
-            
-            # 清理临时文件
-            if os.path.exists(data_file):
-                os.remove(data_file)
         
         return pd.DataFrame(results)
     
-    def analyze_time_estimation_impact(self) -> pd.DataFrame:
+    def analyze_time_estimation_impact(self) -> List[Dict]:
         """分析时间估计误差对调度效果的影响"""
         error_ranges = ['±10%', '±25%', '±50%']
         results = []
@@ -198,9 +227,9 @@ class AcademicExperiment:
                 'recommended_mode': recommended_mode
             })
         
-        return pd.DataFrame(results)
+        return results
     
-    def analyze_code_quality_improvement(self) -> pd.DataFrame:
+    def analyze_code_quality_improvement(self) -> List[Dict]:
         """分析代码质量改善情况"""
         metrics = [
             {'metric': '代码行数', 'before': 1455, 'after': 1200, 'unit': '行', 'improvement_type': '结构化'},
@@ -210,18 +239,19 @@ class AcademicExperiment:
             {'metric': '测试覆盖率', 'before': 0, 'after': 92, 'unit': '%', 'improvement_type': '新增'}
         ]
         
-        df = pd.DataFrame(metrics)
-        df['improvement'] = np.where(
-            df['improvement_type'].str.contains('%'),
-            df['improvement_type'],
-            ((df['after'] - df['before']) / df['before'] * 100).round(1).astype(str) + '%'
-        )
+        for metric in metrics:
+            if '%' in metric['improvement_type']:
+                metric['improvement'] = metric['improvement_type']
+            else:
+                before, after = metric['before'], metric['after']
+                change = (after - before) / before * 100 if before else float('inf')
+                metric['improvement'] = f"{round(change, 1)}%"
         
-        return df
+        return metrics
     
     def create_performance_chart(self, df: pd.DataFrame):
         """创建性能对比图表"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+        fig, (ax1, ax2) = self._new_chart((15, 6), 1, 2)
         
         # 执行时间对比
         x = np.arange(len(df))
@@ -249,86 +279,74 @@ class AcademicExperiment:
         ax2.legend()
         ax2.grid(True, alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig('performance_comparison.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_chart(fig, 'performance_comparison.png')
     
-    def create_time_estimation_chart(self, df: pd.DataFrame):
+    def create_time_estimation_chart(self, rows: List[Dict]):
         """创建时间估计影响图表"""
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._new_chart((10, 6))
         
-        x = np.arange(len(df))
+        x = np.arange(len(rows))
         width = 0.35
         
-        bars1 = ax.bar(x - width/2, df['time_success_rate'], width, 
+        bars1 = ax.bar(x - width/2, [row['time_success_rate'] for row in rows], width, 
                       label='时间调度成功率', alpha=0.8, color='#1f77b4')
-        bars2 = ax.bar(x + width/2, df['sequence_applicability'], width,
+        bars2 = ax.bar(x + width/2, [row['sequence_applicability'] for row in rows], width,
                       label='序列调度适用性', alpha=0.8, color='#ff7f0e')
         
         ax.set_xlabel('时间估计误差范围')
         ax.set_ylabel('成功率/适用性 (%)')
         ax.set_title('时间估计误差对调度模式的影响')
         ax.set_xticks(x)
-        ax.set_xticklabels(df['error_range'])
+        ax.set_xticklabels([row['error_range'] for row in rows])
         ax.legend()
         ax.grid(True, alpha=0.3)
         
         # 添加数值标签
-        def add_value_labels(bars):
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                       f'{int(height)}%', ha='center', va='bottom')
-        
-        add_value_labels(bars1)
-        add_value_labels(bars2)
-        
-        plt.tight_layout()
-        plt.savefig('time_estimation_impact.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        ax.bar_label(bars1, fmt='%d%%', padding=3)
+        ax.bar_label(bars2, fmt='%d%%', padding=3)
+        
+        self._save_chart(fig, 'time_estimation_impact.png')
     
-    def create_architecture_improvement_chart(self, df: pd.DataFrame):
+    def create_architecture_improvement_chart(self, rows: List[Dict]):
         """创建架构改善图表"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+        fig, ((ax1, ax2), (ax3, ax4)) = self._new_chart((15, 10), 2, 2)
         
         # 代码行数对比
-        ax1.bar(['重构前', '重构后'], [df.iloc[0]['before'], df.iloc[0]['after']], 
+        ax1.bar(['重构前', '重构后'], [rows[0]['before'], rows[0]['after']], 
                color=['#ff7f0e', '#2ca02c'], alpha=0.8)
         ax1.set_title('代码行数对比')
         ax1.set_ylabel('代码行数')
         
         # 重复代码消除
-        ax2.bar(['重构前', '重构后'], [df.iloc[1]['before'], df.iloc[1]['after']], 
+        ax2.bar(['重构前', '重构后'], [rows[1]['before'], rows[1]['after']], 
                color=['#ff7f0e', '#2ca02c'], alpha=0.8)
         ax2.set_title('重复代码方法数')
         ax2.set_ylabel('重复方法数')
         
         # 圈复杂度降低
-        ax3.bar(['重构前', '重构后'], [df.iloc[2]['before'], df.iloc[2]['after']], 
+        ax3.bar(['重构前', '重构后'], [rows[2]['before'], rows[2]['after']], 
                color=['#ff7f0e', '#2ca02c'], alpha=0.8)
         ax3.set_title('平均圈复杂度')
         ax3.set_ylabel('复杂度值')
         
         # 模块化程度
-        ax4.bar(['重构前', '重构后'], [df.iloc[3]['before'], df.iloc[3]['after']], 
+        ax4.bar(['重构前', '重构后'], [rows[3]['before'], rows[3]['after']], 
                color=['#ff7f0e', '#2ca02c'], alpha=0.8)
         ax4.set_title('模块数量')
         ax4.set_ylabel('模块数')
         
-        plt.tight_layout()
-        plt.savefig('architecture_improvement.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_chart(fig, 'architecture_improvement.png')
     
     def generate_algorithm_complexity_data(self):
         """生成算法复杂度分析数据"""
-        n_values = np.logspace(1, 3, 20)  # 10 到 1000 的对数分布
+        n_values = np.unique(np.logspace(1, 3, 20).astype(np.int64))  # 10 到 1000 的对数分布（取整）
         
         # 理论复杂度
-        dependency_check = n_values + n_values * 0.5  # O(V + E), E ≈ 0.5V
+        dependency_check = 1.5 * n_values  # O(V + E), E ≈ 0.5V
         priority_calc = n_values * np.log2(n_values)  # O(N log N)
-        scheduling = n_values ** 2 * 3  # O(N² × R), R ≈ 3
+        scheduling = 3.0 * n_values * n_values  # O(N² × R), R ≈ 3
         
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._new_chart((10, 6))
         
         ax.loglog(n_values, dependency_check, 'o-', label='依赖关系检查 O(V+E)', linewidth=2)
         ax.loglog(n_values, priority_calc, 's-', label='优先级计算 O(N log N)', linewidth=2)
@@ -340,9 +358,7 @@ class AcademicExperiment:
         ax.legend()
         ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig('algorithm_complexity.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        self._save_chart(fig, 'algorithm_complexity.png')
     
     def run_complete_analysis(self):
         """运行完整的实验分析"""
@@ -355,13 +371,13 @@ class AcademicExperiment:
         
         # 2. 时间估计影响分析
         print("\n2. 分析时间估计误差影响...")
-        time_estimation_df = self.analyze_time_estimation_impact()
-        print(time_estimation_df)
+        time_estimation_rows = self.analyze_time_estimation_impact()
+        _print_rows(time_estimation_rows)
         
         # 3. 代码质量改善分析
         print("\n3. 分析代码质量改善...")
-        code_quality_df = self.analyze_code_quality_improvement()
-        print(code_quality_df)
+        code_quality_rows = self.analyze_code_quality_improvement()
+        _print_rows(code_quality_rows)
         
         # 4. 生成图表
         print("\n4. 生成可视化图表...")
@@ -370,16 +386,28 @@ class AcademicExperiment:
         os.makedirs('experiments', exist_ok=True)
         os.chdir('experiments')
         
-        self.create_performance_chart(performance_df)
-        self.create_time_estimation_chart(time_estimation_df)
-        self.create_architecture_improvement_chart(code_quality_df)
-        self.generate_algorithm_complexity_data()
+        chart_jobs = [
+            ('create_performance_chart', performance_df),
+            ('create_time_estimation_chart', time_estimation_rows),
+            ('create_architecture_improvement_chart', code_quality_rows),
+            ('generate_algorithm_complexity_data',),
+        ]
+        if INTERACTIVE:
+            # 交互模式需要在主进程中显示图表
+            for job in chart_jobs:
+                _render_chart(*job)
+        else:
+            # 各图表相互独立，分发到多个进程并行渲染
+            with ProcessPoolExecutor(max_workers=len(chart_jobs)) as executor:
+                futures = [executor.submit(_render_chart, *job) for job in chart_jobs]
+                for future in futures:
+                    future.result()
         
         # 5. 保存实验数据
         print("\n5. 保存实验数据...")
         performance_df.to_csv('performance_results.csv', index=False, encoding='utf-8-sig')
-        time_estimation_df.to_csv('time_estimation_analysis.csv', index=False, encoding='utf-8-sig')
-        code_quality_df.to_csv('code_quality_improvement.csv', index=False, encoding='utf-8-sig')
+        _write_csv(time_estimation_rows, 'time_estimation_analysis.csv')
+        _write_csv(code_quality_rows, 'code_quality_improvement.csv')
         
         print("\n实验分析完成！生成的文件：")
         print("- performance_results.csv: 性能对比数据")
@@ -390,6 +418,32 @@ class AcademicExperiment:
         print("- architecture_improvement.png: 架构改善图表")
         print("- algorithm_complexity.png: 算法复杂度分析图表")
 
+
+def _write_csv(rows: List[Dict], path: str):
+    """将小型结果表直接写为CSV（带BOM，便于Excel打开）"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [], lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _print_rows(rows: List[Dict]):
+    """将小型结果表按列对齐打印到控制台（首行为列名）"""
+    if not rows:
+        return
+    columns = list(rows[0])
+    table = [columns] + [[str(row.get(column, '')) for column in columns] for row in rows]
+    widths = [max(display_width(line[i]) for line in table) for i in range(len(columns))]
+    for line in table:
+        print('  '.join(value + ' ' * (width - display_width(value))
+                        for value, width in zip(line, widths)).rstrip())
+
+
+def _render_chart(method_name: str, *args):
+    """在独立的实验实例上渲染单个图表（供进程池调用）"""
+    getattr(AcademicExperiment(), method_name)(*args)
+
+
 if __name__ == "__main__":
     experiment = AcademicExperiment()
     experiment.run_complete_analysis()
\ No newline at end of file
@@ -4,7 +4,16 @@
 """
 from dataclasses import dataclass, field
 from typing import List, Dict, Set, Tuple, Optional
+from collections import Counter
 from enum import Enum
+from functools import lru_cache
+from bisect import bisect_right
+import heapq
+import sys
+import numpy as np
+
+# Python 3.10+ 支持slots=True，减少实例内存并加快属性访问
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
 
 class TestPhase(Enum):
@@ -18,7 +27,7 @@ class TestPhase(Enum):
     RANGE_TEST = "靶场测试"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TestItem:
     """测试项数据模型"""
     test_id: int
@@ -37,7 +46,7 @@ class TestItem:
             raise ValueError(f"测试项 {self.test_id} 的测试项目不能为空")
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Instrument:
     """仪器设备模型"""
     name: str
@@ -48,7 +57,7 @@ class Instrument:
             raise ValueError(f"仪器 {self.name} 的数量必须大于0")
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ScheduledTest:
     """已调度的测试项模型"""
     test_id: int
@@ -58,13 +67,14 @@ class ScheduledTest:
     start_time: float  # 小时
     duration: int      # 小时
     end_time: float    # 小时
+    test_idx: Optional[int] = None  # 测试项在test_items中的索引
     
     def __post_init__(self):
         if self.end_time != self.start_time + self.duration:
             self.end_time = self.start_time + self.duration
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ResourceUsage:
     """资源使用情况模型"""
     instrument_name: str
@@ -79,22 +89,20 @@ class ResourceUsage:
             self.usage_percentage = min(100.0, (self.required_count / self.available_count) * 100)
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class GroupPhase:
     """测试组-阶段组合模型"""
     group: str
     phase: str
-    
-    def __hash__(self):
-        return hash((self.group, self.phase))
-    
-    def __eq__(self, other):
-        if not isinstance(other, GroupPhase):
-            return False
-        return self.group == other.group and self.phase == other.phase
 
 
-@dataclass
+@lru_cache(maxsize=None)
+def get_group_phase(group: str, phase: str) -> GroupPhase:
+    """获取组-阶段组合的规范实例（相同组合复用同一对象）"""
+    return GroupPhase(group, phase)
+
+
+@dataclass(**_SLOTS)
 class SchedulingState:
     """调度状态模型"""
     current_time: float
@@ -102,36 +110,155 @@ class SchedulingState:
     scheduled_tests: List[ScheduledTest] = field(default_factory=list)
     unscheduled_test_ids: Set[int] = field(default_factory=set)
     active_group_phases: Set[GroupPhase] = field(default_factory=set)
+    completed_ids: Set[int] = field(default_factory=set)
+    scheduled_by_id: Dict[int, ScheduledTest] = field(default_factory=dict)
+    completed_mask: Optional[np.ndarray] = None  # 已完成测试项掩码（按测试项索引）
+    end_time_by_idx: Optional[np.ndarray] = None # 各测试项的结束时间（未调度为inf，按测试项索引）
+    resource_rows: Optional[np.ndarray] = None   # 各测试项的资源需求（按测试项索引）
+    active_usage: Optional[np.ndarray] = None    # 活跃测试项的资源占用累计
+    active_bits: int = 0                         # 活跃测试项位图（第i位对应测试项索引i）
+    active_mask: Optional[np.ndarray] = None     # 活跃测试项掩码（按测试项索引，与end_time_by_idx构成列式存储）
+    makespan: float = 0.0                        # 已调度测试项的最晚结束时间（随调度增量更新）
+    unscheduled_mask: Optional[np.ndarray] = None  # 未调度测试项掩码（按测试项索引，与unscheduled_test_ids同步）
+    unscheduled_version: int = 0                 # 未调度集合的修改次数（供优先级排序结果缓存判断是否失效）
+    _test_at_idx: List[Optional[ScheduledTest]] = field(init=False, repr=False, compare=False, default_factory=list)  # 测试项索引 -> 已调度测试
+    _end_heap: List[Tuple[float, int, ScheduledTest]] = field(init=False, repr=False, compare=False, default_factory=list)  # 无索引测试的(结束时间, 测试ID, 测试)
+    _gp_counts: Counter = field(init=False, repr=False, compare=False, default_factory=Counter)  # 组-阶段 -> 活跃测试数
+    _end_times: List[float] = field(init=False, repr=False, compare=False, default_factory=list)  # 已调度测试的结束时间（升序）
+    _end_positions: List[int] = field(init=False, repr=False, compare=False, default_factory=list)  # 与_end_times对应的scheduled_tests下标
+    _unindexed_active: int = field(default=0, init=False, repr=False, compare=False)  # 没有test_idx的活跃测试数（不计入位图与资源占用）
+    
+    def __post_init__(self):
+        if self.resource_rows is not None and self.active_usage is None:
+            self.active_usage = np.zeros(self.resource_rows.shape[1], dtype=self.resource_rows.dtype)
+        if self.resource_rows is not None and self.end_time_by_idx is None:
+            self.end_time_by_idx = np.full(self.resource_rows.shape[0], np.inf, dtype=np.float64)
+        if self.end_time_by_idx is not None and self.active_mask is None:
+            self.active_mask = np.zeros(len(self.end_time_by_idx), dtype=bool)
+            self._test_at_idx = [None] * len(self.end_time_by_idx)
+        for test in self.active_tests:
+            self._track_active(test)
+        if self.scheduled_tests:
+            self.makespan = max(test.end_time for test in self.scheduled_tests)
+            order = sorted(range(len(self.scheduled_tests)), key=lambda pos: self.scheduled_tests[pos].end_time)
+            self._end_times = [self.scheduled_tests[pos].end_time for pos in order]
+            self._end_positions = order
+    
+    @property
+    def complete_active_bits(self) -> Optional[int]:
+        """覆盖全部活跃测试的位图；存在没有test_idx的活跃测试时为None（调用方需逐项扫描）"""
+        return self.active_bits if not self._unindexed_active else None
+    
+    @property
+    def complete_active_usage(self) -> Optional[np.ndarray]:
+        """覆盖全部活跃测试的资源占用；存在没有test_idx的活跃测试时为None（调用方需逐项累计）"""
+        return self.active_usage if not self._unindexed_active else None
+    
+    def add_active(self, test_idx: int):
+        """登记开始执行的测试项（位图、掩码及资源占用）"""
+        self.active_bits |= 1 << test_idx
+        if self.active_mask is not None:
+            self.active_mask[test_idx] = True
+        if self.active_usage is not None:
+            self.active_usage += self.resource_rows[test_idx]
+    
+    def remove_active(self, test_idx: int):
+        """注销已完成的测试项（位图、掩码及资源占用）"""
+        self.active_bits &= ~(1 << test_idx)
+        if self.active_mask is not None:
+            self.active_mask[test_idx] = False
+        if self.active_usage is not None:
+            self.active_usage -= self.resource_rows[test_idx]
+    
+    def _track_active(self, test: ScheduledTest):
+        """登记活跃测试：有索引的测试记入列式存储，其余放入结束时间堆"""
+        if test.test_idx is not None and self.active_mask is not None:
+            self._test_at_idx[test.test_idx] = test
+            self.end_time_by_idx[test.test_idx] = test.end_time
+            self.add_active(test.test_idx)
+        else:
+            if test.test_idx is not None:
+                self.add_active(test.test_idx)
+            else:
+                self._unindexed_active += 1
+            heapq.heappush(self._end_heap, (test.end_time, test.test_id, test))
+        
+        # 更新活跃组-阶段
+        if test.test_group:
+            group_phase = get_group_phase(test.test_group, test.test_phase)
+            self._gp_counts[group_phase] += 1
+            self.active_group_phases.add(group_phase)
     
     def add_scheduled_test(self, test: ScheduledTest):
         """添加已调度的测试"""
+        if not self.scheduled_tests or test.end_time > self.makespan:
+            self.makespan = test.end_time
+        # 按结束时间有序插入（结束时间相同者排在后面）
+        insert_at = bisect_right(self._end_times, test.end_time)
+        self._end_times.insert(insert_at, test.end_time)
+        self._end_positions.insert(insert_at, len(self.scheduled_tests))
         self.scheduled_tests.append(test)
+        self.scheduled_by_id.setdefault(test.test_id, test)
         self.active_tests.append(test)
-        self.unscheduled_test_ids.discard(test.test_id)
+        removed = test.test_id in self.unscheduled_test_ids
+        if removed:
+            self.unscheduled_test_ids.discard(test.test_id)
+        if (test.test_idx is not None and self.unscheduled_mask is not None
+                and self.unscheduled_mask[test.test_idx]):
+            self.unscheduled_mask[test.test_idx] = False
+            removed = True
+        if removed:
+            self.unscheduled_version += 1
+        self._track_active(test)
+    
+    def get_tests_completed_between(self, start_time: float, end_time: float) -> List[ScheduledTest]:
+        """按调度顺序返回结束时间位于(start_time, end_time]内的已调度测试（在有序结束时间上二分查找）"""
+        lo = bisect_right(self._end_times, start_time)
+        hi = bisect_right(self._end_times, end_time)
+        scheduled_tests = self.scheduled_tests
+        return [scheduled_tests[pos] for pos in sorted(self._end_positions[lo:hi])]
+    
+    def expire(self, current_time: float) -> List[ScheduledTest]:
+        """在时间推进时一次性取出已完成的活跃测试（列式存储按掩码筛选，其余从堆中弹出）"""
+        completed_tests = []
+        if self.active_mask is not None:
+            done = np.flatnonzero(self.active_mask & (self.end_time_by_idx <= current_time))
+            if done.size:
+                test_at_idx = self._test_at_idx
+                completed_tests = [test_at_idx[i] for i in done.tolist()]
+        end_heap = self._end_heap
+        while end_heap and end_heap[0][0] <= current_time:
+            completed_tests.append(heapq.heappop(end_heap)[2])
+        if not completed_tests:
+            return completed_tests
         
-        # 更新活跃组-阶段
-        if test.test_group:
-            group_phase = GroupPhase(test.test_group, test.test_phase)
-            self.active_group_phases.add(group_phase)
+        self.active_tests = [test for test in self.active_tests if test.end_time > current_time]
+        for test in completed_tests:
+            self.completed_ids.add(test.test_id)
+            if test.test_idx is not None:
+                self.remove_active(test.test_idx)
+                if self.completed_mask is not None:
+                    self.completed_mask[test.test_idx] = True
+            else:
+                self._unindexed_active -= 1
+            
+            # 组-阶段活跃计数归零时移出活跃集合
+            if test.test_group:
+                group_phase = get_group_phase(test.test_group, test.test_phase)
+                self._gp_counts[group_phase] -= 1
+                if self._gp_counts[group_phase] <= 0:
+                    del self._gp_counts[group_phase]
+                    self.active_group_phases.discard(group_phase)
+        return completed_tests
     
     def update_active_tests(self, current_time: float):
         """更新活跃测试列表"""
         self.current_time = current_time
-        # 移除已完成的测试
-        completed_tests = [test for test in self.active_tests if test.end_time <= current_time]
-        self.active_tests = [test for test in self.active_tests if test.end_time > current_time]
-        
-        # 更新活跃组-阶段
-        self.active_group_phases = set()
-        for test in self.active_tests:
-            if test.test_group:
-                group_phase = GroupPhase(test.test_group, test.test_phase)
-                self.active_group_phases.add(group_phase)
-        
-        return completed_tests
+        # 移除已完成的测试（活跃组-阶段随之增量更新）
+        return self.expire(current_time)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SchedulingResult:
     """调度结果模型"""
     scheduled_tests: List[ScheduledTest]
@@ -145,7 +272,7 @@ class SchedulingResult:
             self.total_duration = 0.0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class PriorityScore:
     """优先级评分模型"""
     test_id: int
@@ -154,60 +281,118 @@ class PriorityScore:
     resource_score: float = 0.0
     phase_score: float = 0.0
     continuity_score: float = 0.0
-    total_score: float = field(init=False)
+    total_score: Optional[float] = None  # 可由调用方传入批量预计算的总分
     
     def __post_init__(self):
-        self.total_score = (
-            self.dependency_score + 
-            self.duration_score + 
-            self.resource_score + 
-            self.phase_score + 
-            self.continuity_score
-        )
+        # 总分在构造时确定，之后再赋值的continuity_score不计入总分
+        if self.total_score is None:
+            self.total_score = (
+                self.dependency_score + 
+                self.duration_score + 
+                self.resource_score + 
+                self.phase_score + 
+                self.continuity_score
+            )
 
 
-@dataclass
+def _empty_indptr() -> np.ndarray:
+    return np.zeros(1, dtype=np.int32)
+
+
+def _empty_indices() -> np.ndarray:
+    return np.zeros(0, dtype=np.int32)
+
+
+@dataclass(**_SLOTS)
 class DependencyGraph:
-    """依赖关系图模型"""
+    """依赖关系图模型（以CSR/CSC稀疏结构存储依赖边）"""
     dependencies: Dict[str, List[str]] = field(default_factory=dict)
     item_to_index: Dict[str, int] = field(default_factory=dict)
-    dependency_matrix: List[List[int]] = field(default_factory=list)
+    n_tests: int = 0
+    # CSR（出边）：out_indices[out_indptr[i]:out_indptr[i+1]] 为测试项i依赖的测试项索引（升序）
+    out_indptr: np.ndarray = field(default_factory=_empty_indptr)
+    out_indices: np.ndarray = field(default_factory=_empty_indices)
+    # CSC（入边）：in_indices[in_indptr[j]:in_indptr[j+1]] 为依赖测试项j的测试项索引（升序）
+    in_indptr: np.ndarray = field(default_factory=_empty_indptr)
+    in_indices: np.ndarray = field(default_factory=_empty_indices)
+    in_degree: np.ndarray = field(default_factory=_empty_indices)  # 各测试项的被依赖数量
+    # 与out_indices对齐：依赖j对应的test_id为j+1的测试项索引（不存在为-1）
+    out_targets: np.ndarray = field(default_factory=_empty_indices)
+    # 可解析的依赖边（边列表）：测试项prereq_src[e]依赖测试项索引prereq_dst[e]
+    prereq_src: np.ndarray = field(default_factory=_empty_indices)
+    prereq_dst: np.ndarray = field(default_factory=_empty_indices)
+    unresolved_mask: Optional[np.ndarray] = None   # 依赖的测试项ID不存在，永远无法满足
     
     def build_matrix(self, test_items: List[TestItem]):
-        """构建依赖关系矩阵"""
+        """构建依赖关系的稀疏结构"""
         n = len(test_items)
+        self.n_tests = n
         self.item_to_index = {item.test_item: i for i, item in enumerate(test_items)}
-        self.dependency_matrix = [[0] * n for _ in range(n)]
         
+        # 收集依赖边 (i依赖j)
+        src, dst = [], []
         for item, deps in self.dependencies.items():
             if item in self.item_to_index:
                 i = self.item_to_index[item]
                 for dep in deps:
                     if dep in self.item_to_index:
-                        j = self.item_to_index[dep]
-                        self.dependency_matrix[i][j] = 1
+                        src.append(i)
+                        dst.append(self.item_to_index[dep])
+        
+        # 去重并按 (i, j) 排序
+        keys = np.unique(np.asarray(src, dtype=np.int64) * max(n, 1) + np.asarray(dst, dtype=np.int64))
+        src = (keys // max(n, 1)).astype(np.int32)
+        dst = (keys % max(n, 1)).astype(np.int32)
+        
+        self.out_indptr = np.zeros(n + 1, dtype=np.int32)
+        np.add.at(self.out_indptr[1:], src, 1)
+        np.cumsum(self.out_indptr, out=self.out_indptr)
+        self.out_indices = dst
+        
+        order = np.lexsort((src, dst))
+        self.in_indptr = np.zeros(n + 1, dtype=np.int32)
+        np.add.at(self.in_indptr[1:], dst, 1)
+        np.cumsum(self.in_indptr, out=self.in_indptr)
+        self.in_indices = src[order]
+        self.in_degree = np.bincount(dst, minlength=n).astype(np.int32)
+        
+        # 依赖j按test_id为j+1的测试项判断是否完成（test_id从1开始）
+        id_to_index = {item.test_id: k for k, item in enumerate(test_items)}
+        self.out_targets = np.fromiter((id_to_index.get(j + 1, -1) for j in dst.tolist()),
+                                       dtype=np.int32, count=len(dst))
+        self.unresolved_mask = np.zeros(n, dtype=bool)
+        resolved = self.out_targets >= 0
+        self.prereq_src = src[resolved]
+        self.prereq_dst = self.out_targets[resolved]
+        self.unresolved_mask[src[~resolved]] = True
+    
+    def get_prerequisites(self, test_idx: int) -> np.ndarray:
+        """获取测试项依赖的测试项索引（升序）"""
+        if test_idx >= self.n_tests:
+            return _empty_indices()
+        return self.out_indices[self.out_indptr[test_idx]:self.out_indptr[test_idx + 1]]
+    
+    def has_dependency(self, test_idx: int, dep_idx: int) -> bool:
+        """判断测试项test_idx是否依赖测试项dep_idx"""
+        prereqs = self.get_prerequisites(test_idx)
+        pos = int(np.searchsorted(prereqs, dep_idx))
+        return pos < len(prereqs) and int(prereqs[pos]) == dep_idx
     
     def get_dependencies_count(self, test_idx: int) -> int:
         """获取测试项的被依赖数量"""
-        if test_idx >= len(self.dependency_matrix):
-            return 0
-        return sum(self.dependency_matrix[i][test_idx] for i in range(len(self.dependency_matrix)))
+        return int(self.in_degree[test_idx]) if test_idx < self.in_degree.size else 0
     
-    def check_dependencies_satisfied(self, test_idx: int, scheduled_tests: List[ScheduledTest], current_time: float) -> bool:
-        """检查依赖关系是否满足"""
-        if test_idx >= len(self.dependency_matrix):
+    def check_dependencies_satisfied(self, test_idx: int, end_time_by_idx: np.ndarray, current_time: float) -> bool:
+        """检查依赖关系是否满足（end_time_by_idx为各测试项的结束时间，未调度为inf）"""
+        if test_idx >= self.n_tests:
             return True
-            
-        for j in range(len(self.dependency_matrix)):
-            if self.dependency_matrix[test_idx][j] == 1:
-                # 查找依赖的测试项是否已完成
-                dependent_test = next(
-                    (test for test in scheduled_tests if test.test_id == j + 1),  # test_id从1开始
-                    None
-                )
-                if not dependent_test or dependent_test.end_time > current_time:
-                    return False
-        return True
+        
+        targets = self.out_targets[self.out_indptr[test_idx]:self.out_indptr[test_idx + 1]]
+        if not len(targets):
+            return True
+        if (targets < 0).any():
+            return False
+        return bool((end_time_by_idx[targets] <= current_time).all())
 
 
 class DataValidator:
@@ -223,12 +408,16 @@ class DataValidator:
         if len(test_ids) != len(set(test_ids)):
             errors.append("测试项ID存在重复")
         
-        # 检查必填字段
-        for item in test_items:
-            if not item.test_item.strip():
-                errors.append(f"测试项 {item.test_id} 的测试项目名称不能为空")
-            if item.duration <= 0:
-                errors.append(f"测试项 {item.test_id} 的持续时间必须大于0")
+        # 检查必填字段：按列一次性判断，仅对不合格的测试项按原顺序生成错误信息
+        n_items = len(test_items)
+        blank_names = np.fromiter((not item.test_item.strip() for item in test_items), dtype=bool, count=n_items)
+        bad_durations = np.fromiter((item.duration for item in test_items), dtype=np.float64, count=n_items) <= 0
+        for i in np.flatnonzero(blank_names | bad_durations).tolist():
+            test_id = test_items[i].test_id
+            if blank_names[i]:
+                errors.append(f"测试项 {test_id} 的测试项目名称不能为空")
+            if bad_durations[i]:
+                errors.append(f"测试项 {test_id} 的持续时间必须大于0")
         
         return errors
     
@@ -248,9 +437,17 @@ class DataValidator:
     @staticmethod
     def validate_dependencies(dependencies: Dict[str, List[str]], test_items: List[TestItem]) -> List[str]:
         """验证依赖关系数据"""
-        errors = []
-        test_item_names = {item.test_item for item in test_items}
+        return DataValidator._validate_dependency_names(dependencies, {item.test_item for item in test_items})
+    
+    @staticmethod
+    def _validate_dependency_names(dependencies: Dict[str, List[str]], test_item_names: Set[str]) -> List[str]:
+        """按测试项名称集合验证依赖关系"""
+        # 所有引用的名称都存在时直接返回，仅在有缺失时逐项生成有序的错误信息
+        referenced = set(dependencies).union(*dependencies.values())
+        if referenced <= test_item_names:
+            return []
         
+        errors = []
         for item, deps in dependencies.items():
             if item not in test_item_names:
                 errors.append(f"依赖关系中的测试项 '{item}' 不存在")
@@ -259,4 +456,13 @@ class DataValidator:
                 if dep not in test_item_names:
                     errors.append(f"依赖关系中的测试项 '{dep}' 不存在")
         
-        return errors
\ No newline at end of file
+        return errors
+    
+    @classmethod
+    def validate_all(cls, test_items: List[TestItem], instruments: Dict[str, int],
+                     dependencies: Dict[str, List[str]]) -> List[str]:
+        """一次性验证测试项、仪器设备和依赖关系数据"""
+        errors = cls.validate_test_items(test_items)
+        errors.extend(cls.validate_instruments(instruments))
+        errors.extend(cls._validate_dependency_names(dependencies, {item.test_item for item in test_items}))
+        return errors
@@ -4,11 +4,48 @@
 """
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import os
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from models import ScheduledTest, SchedulingResult, TestItem, DependencyGraph
 from config import OutputConfig, WorkingTimeConfig
-from time_manager import TimeFormatter
+from time_manager import TimeFormatter, WorkingTimeManager
+
+
+def display_width(text: str) -> int:
+    """
+    计算文本在控制台中的显示宽度
+    
+    Args:
+        text: 文本
+        
+    Returns:
+        int: 显示宽度（全角/宽字符按2列计算）
+    """
+    if text.isascii():
+        return len(text)
+    return sum(2 if unicodedata.east_asian_width(ch) in ('F', 'W') else 1 for ch in text)
+
+
+def _group_segments(keys: List[Any]) -> Tuple[List[Any], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按键的首次出现顺序分组，供np.ufunc.reduceat做分段归约
+    
+    Args:
+        keys: 每行的分组键
+        
+    Returns:
+        (唯一键列表, 按组稳定排序后的行序, 各组在排序后数组中的起始偏移, 各组行数)
+    """
+    first_seen = {}
+    codes = np.fromiter((first_seen.setdefault(key, len(first_seen)) for key in keys),
+                        dtype=np.int64, count=len(keys))
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(first_seen))
+    offsets = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=offsets[1:])
+    return list(first_seen), order, offsets, counts
 
 
 class ScheduleTableFormatter:
@@ -22,6 +59,10 @@ class ScheduleTableFormatter:
         
         # 创建测试项映射
         self.test_id_to_item = {item.test_id: item for item in test_items}
+        self.test_id_to_index = {item.test_id: i for i, item in enumerate(test_items)}
+        self.test_item_names = [item.test_item for item in test_items]
+        self._dependency_names_by_index = None
+        self._dependency_text_by_id = None
     
     def format_detailed_table(self, result: SchedulingResult) -> pd.DataFrame:
         """
@@ -33,43 +74,57 @@ class ScheduleTableFormatter:
         Returns:
             pd.DataFrame: 格式化的详细表格
         """
-        detailed_schedule = []
+        # 按列收集（SoA），最后按开始时间一次性排序构建DataFrame
+        ids, phases, groups, names = [], [], [], []
+        equipment, instruments, durations = [], [], []
+        dependencies_col = []
+        starts, ends = [], []
+        
+        get_item = self.test_id_to_item.get
+        dependency_text = self._get_dependency_text_map()
         
         for test in result.scheduled_tests:
             # 获取测试项的完整信息
-            test_item = self.test_id_to_item.get(test.test_id)
+            test_item = get_item(test.test_id)
             if not test_item:
                 continue
             
-            # 构建详细信息字典
-            detailed_task = {
-                '测试ID': test.test_id,
-                '测试阶段': test_item.test_phase,
-                '测试组': test.test_group if test.test_group else '无',
-                '测试项目': test.test_item,
-                '所需设备': test_item.required_equipment if test_item.required_equipment else '无',
-                '陪试装备': test_item.required_instruments if test_item.required_instruments else '无',
-                '持续时间': self.time_formatter.format_duration(test.duration),
-                '开始时间': self.time_formatter.format_time(test.start_time),
-                '结束时间': self.time_formatter.format_time(test.end_time),
-                '原始开始时间': test.start_time  # 用于排序
-            }
+            ids.append(test.test_id)
+            phases.append(test_item.test_phase)
+            groups.append(test.test_group if test.test_group else '无')
+            names.append(test.test_item)
+            equipment.append(test_item.required_equipment if test_item.required_equipment else '无')
+            instruments.append(test_item.required_instruments if test_item.required_instruments else '无')
+            durations.append(test.duration)
+            starts.append(test.start_time)
+            ends.append(test.end_time)
             
             # 添加依赖项信息
-            dependencies = self._get_test_dependencies(test.test_id)
-            detailed_task['依赖项目'] = ', '.join(dependencies) if dependencies else '无'
-            
-            detailed_schedule.append(detailed_task)
+            dependencies_col.append(dependency_text.get(test.test_id, '无'))
         
-        # 转换为DataFrame并排序
-        if not detailed_schedule:
+        if not ids:
             return pd.DataFrame()
         
-        result_df = pd.DataFrame(detailed_schedule)
-        result_df = result_df.sort_values('原始开始时间')
-        result_df = result_df.drop('原始开始时间', axis=1)
-        
-        return result_df
+        columns = {
+            '测试ID': ids,
+            '测试阶段': phases,
+            '测试组': groups,
+            '测试项目': names,
+            '所需设备': equipment,
+            '陪试装备': instruments,
+            '持续时间': self.time_formatter.format_durations(durations),
+            '开始时间': self.time_formatter.format_times(starts),
+            '结束时间': self.time_formatter.format_times(ends),
+            '依赖项目': dependencies_col,
+        }
+        
+        # 按原始开始时间排序（稳定排序，同一时间保持调度顺序），行索引保留调度顺序中的原始位置
+        order = np.argsort(np.asarray(starts, dtype=np.float64), kind='stable').tolist()
+        if order != list(range(len(order))):
+            columns = {name: [values[k] for k in order] for name, values in columns.items()}
+            return pd.DataFrame(columns, index=order)
+        
+        return pd.DataFrame(columns)
     
     def format_phase_summary(self, result: SchedulingResult) -> pd.DataFrame:
         """
@@ -81,44 +136,49 @@ class ScheduleTableFormatter:
         Returns:
             pd.DataFrame: 阶段汇总表格
         """
-        phase_stats = {}
-        phase_duration = {}
+        headers, rows = self.format_phase_summary_rows(result)
+        return pd.DataFrame(rows, columns=headers) if rows else pd.DataFrame()
+    
+    def format_phase_summary_rows(self, result: SchedulingResult) -> Tuple[List[str], List[tuple]]:
+        """
+        按阶段汇总，返回不经过DataFrame的轻量表格（供Excel等小表导出直接使用）
         
+        Args:
+            result: 调度结果
+            
+        Returns:
+            (表头列表, 行元组列表)，无数据时行列表为空
+        """
+        headers = ['测试阶段', '测试项数量', '阶段开始时间', '阶段结束时间', '阶段总耗时']
+        
+        # 一次遍历收集 (阶段, 开始时间, 结束时间) 三列，再按阶段分段归约
+        phases, starts, ends = [], [], []
+        get_item = self.test_id_to_item.get
         for test in result.scheduled_tests:
-            test_item = self.test_id_to_item.get(test.test_id)
+            test_item = get_item(test.test_id)
             if not test_item:
                 continue
-            
-            phase = test_item.test_phase
-            
-            # 统计数量
-            if phase not in phase_stats:
-                phase_stats[phase] = 0
-                phase_duration[phase] = {'min_start': float('inf'), 'max_end': 0}
-            
-            phase_stats[phase] += 1
-            phase_duration[phase]['min_start'] = min(phase_duration[phase]['min_start'], test.start_time)
-            phase_duration[phase]['max_end'] = max(phase_duration[phase]['max_end'], test.end_time)
+            phases.append(test_item.test_phase)
+            starts.append(test.start_time)
+            ends.append(test.end_time)
+        
+        if not phases:
+            return headers, []
+        
+        phase_keys, order, offsets, counts = _group_segments(phases)
+        min_starts = np.minimum.reduceat(np.asarray(starts)[order], offsets).tolist()
+        max_ends = np.maximum.reduceat(np.asarray(ends)[order], offsets).tolist()
         
         # 创建汇总数据
-        summary_data = []
-        for phase, count in phase_stats.items():
-            duration_info = phase_duration[phase]
-            start_time = self.time_formatter.format_time(duration_info['min_start'])
-            end_time = self.time_formatter.format_time(duration_info['max_end'])
-            total_duration = self.time_formatter.format_duration(
-                duration_info['max_end'] - duration_info['min_start']
-            )
-            
-            summary_data.append({
-                '测试阶段': phase,
-                '测试项数量': count,
-                '阶段开始时间': start_time,
-                '阶段结束时间': end_time,
-                '阶段总耗时': total_duration
-            })
-        
-        return pd.DataFrame(summary_data)
+        time_formatter = self.time_formatter
+        rows = list(zip(
+            phase_keys,
+            counts.tolist(),
+            time_formatter.format_times(min_starts),
+            time_formatter.format_times(max_ends),
+            time_formatter.format_durations([e - s for s, e in zip(min_starts, max_ends)])
+        ))
+        return headers, rows
     
     def format_group_summary(self, result: SchedulingResult) -> pd.DataFrame:
         """
@@ -130,67 +190,133 @@ class ScheduleTableFormatter:
         Returns:
             pd.DataFrame: 测试组汇总表格
         """
-        group_stats = {}
+        headers, rows = self.format_group_summary_rows(result)
+        return pd.DataFrame(rows, columns=headers) if rows else pd.DataFrame()
+    
+    def format_group_summary_rows(self, result: SchedulingResult) -> Tuple[List[str], List[tuple]]:
+        """
+        按测试组汇总，返回不经过DataFrame的轻量表格（供Excel等小表导出直接使用）
         
+        Args:
+            result: 调度结果
+            
+        Returns:
+            (表头列表, 行元组列表)，无数据时行列表为空
+        """
+        headers = ['测试组', '测试项数量', '涉及阶段', '组开始时间', '组结束时间', '时间跨度', '工作时长']
+        
+        # 一次遍历收集各列，再按测试组分段归约
+        groups, phases, durations, starts, ends = [], [], [], [], []
         for test in result.scheduled_tests:
             if not test.test_group or test.test_group == '无':
                 continue
-            
-            group = test.test_group
-            if group not in group_stats:
-                group_stats[group] = {
-                    'count': 0,
-                    'phases': set(),
-                    'total_duration': 0,
-                    'min_start': float('inf'),
-                    'max_end': 0
-                }
-            
-            group_stats[group]['count'] += 1
-            group_stats[group]['phases'].add(test.test_phase)
-            group_stats[group]['total_duration'] += test.duration
-            group_stats[group]['min_start'] = min(group_stats[group]['min_start'], test.start_time)
-            group_stats[group]['max_end'] = max(group_stats[group]['max_end'], test.end_time)
+            groups.append(test.test_group)
+            phases.append(test.test_phase)
+            durations.append(test.duration)
+            starts.append(test.start_time)
+            ends.append(test.end_time)
+        
+        if not groups:
+            return headers, []
+        
+        group_keys, order, offsets, counts = _group_segments(groups)
+        min_starts = np.minimum.reduceat(np.asarray(starts)[order], offsets).tolist()
+        max_ends = np.maximum.reduceat(np.asarray(ends)[order], offsets).tolist()
+        total_durations = np.add.reduceat(np.asarray(durations)[order], offsets)
+        
+        # 各组涉及的阶段（去重后按名称排序）
+        ordered_phases = [phases[k] for k in order.tolist()]
+        bounds = offsets.tolist() + [len(ordered_phases)]
+        group_phases = [', '.join(sorted(set(ordered_phases[bounds[g]:bounds[g + 1]])))
+                        for g in range(len(group_keys))]
         
         # 创建汇总数据
-        summary_data = []
-        for group, stats in group_stats.items():
-            start_time = self.time_formatter.format_time(stats['min_start'])
-            end_time = self.time_formatter.format_time(stats['max_end'])
-            span_duration = self.time_formatter.format_duration(stats['max_end'] - stats['min_start'])
-            work_duration = self.time_formatter.format_duration(stats['total_duration'])
-            
-            summary_data.append({
-                '测试组': group,
-                '测试项数量': stats['count'],
-                '涉及阶段': ', '.join(sorted(stats['phases'])),
-                '组开始时间': start_time,
-                '组结束时间': end_time,
-                '时间跨度': span_duration,
-                '工作时长': work_duration
-            })
-        
-        return pd.DataFrame(summary_data)
+        time_formatter = self.time_formatter
+        rows = list(zip(
+            group_keys,
+            counts.tolist(),
+            group_phases,
+            time_formatter.format_times(min_starts),
+            time_formatter.format_times(max_ends),
+            time_formatter.format_durations([e - s for s, e in zip(min_starts, max_ends)]),
+            time_formatter.format_durations(total_durations)
+        ))
+        return headers, rows
     
     def _get_test_dependencies(self, test_id: int) -> List[str]:
         """获取测试项的依赖项目名称列表"""
-        dependencies = []
-        
-        # 在依赖关系矩阵中查找
-        test_idx = next((i for i, item in enumerate(self.test_items) if item.test_id == test_id), None)
-        if test_idx is not None and test_idx < len(self.dependency_graph.dependency_matrix):
-            for j in range(len(self.dependency_graph.dependency_matrix)):
-                if (j < len(self.dependency_graph.dependency_matrix[test_idx]) and 
-                    self.dependency_graph.dependency_matrix[test_idx][j] == 1):
-                    if j < len(self.test_items):
-                        dependencies.append(self.test_items[j].test_item)
-        
-        return dependencies
+        # 在依赖关系图中查找
+        test_idx = self.test_id_to_index.get(test_id)
+        if test_idx is None:
+            return []
+        
+        if self._dependency_names_by_index is None:
+            self._dependency_names_by_index = self._build_dependency_names()
+        return list(self._dependency_names_by_index[test_idx])
+    
+    def _get_dependency_text_map(self) -> Dict[int, str]:
+        """
+        获取测试ID到依赖项目显示文本的映射（首次调用时构建并缓存）
+        
+        Returns:
+            测试ID -> 以', '连接的依赖项目名称，无依赖时为'无'
+        """
+        if self._dependency_text_by_id is None:
+            if self._dependency_names_by_index is None:
+                self._dependency_names_by_index = self._build_dependency_names()
+            dependency_names = self._dependency_names_by_index
+            self._dependency_text_by_id = {
+                test_id: ', '.join(dependency_names[idx]) if dependency_names[idx] else '无'
+                for test_id, idx in self.test_id_to_index.items()
+            }
+        return self._dependency_text_by_id
+    
+    def _build_dependency_names(self) -> List[List[str]]:
+        """
+        基于依赖图的CSR结构一次性生成所有测试项的依赖项目名称列表
+        
+        Returns:
+            按测试项索引排列的依赖项目名称列表
+        """
+        names = self.test_item_names
+        n_items = len(names)
+        dependency_names = [[] for _ in range(n_items)]
+        
+        graph = self.dependency_graph
+        n_rows = min(n_items, graph.n_tests)
+        if n_rows == 0:
+            return dependency_names
+        
+        # 一次向量化展开所有边：行号由indptr差分重复得到，越界的依赖索引被过滤
+        indptr = graph.out_indptr
+        dep_indices = graph.out_indices[:indptr[n_rows]]
+        row_indices = np.repeat(np.arange(n_rows), np.diff(indptr[:n_rows + 1]))
+        valid = dep_indices < n_items
+        
+        for row, dep in zip(row_indices[valid].tolist(), dep_indices[valid].tolist()):
+            dependency_names[row].append(names[dep])
+        
+        return dependency_names
 
 
 class ExcelExporter:
     """Excel导出器"""
     
+    # 单元格格式定义（每个工作簿只创建一次格式对象，由所有工作表共享）
+    HEADER_FORMAT = {
+        'bold': True,
+        'align': 'center',
+        'valign': 'vcenter',
+        'fg_color': '#D9E1F2',
+        'border': 1
+    }
+    CELL_FORMAT = {
+        'align': 'center',
+        'valign': 'vcenter',
+        'border': 1,
+        'text_wrap': True
+    }
+    
     def __init__(self, config: OutputConfig):
         self.config = config
     
@@ -211,47 +337,44 @@ class ExcelExporter:
             filename = self.config.excel_filename
         
         try:
-            with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+            # 三张表的构建互不依赖，并发执行（xlsxwriter写入不是线程安全的，仍在主线程顺序完成）
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                detailed_future = executor.submit(table_formatter.format_detailed_table, result)
+                phase_future = executor.submit(table_formatter.format_phase_summary_rows, result)
+                group_future = executor.submit(table_formatter.format_group_summary_rows, result)
+                detailed_table = detailed_future.result()
+                phase_summary = phase_future.result()
+                group_summary = group_future.result()
+            
+            # constant_memory模式下每写完一行即刷新到临时文件，内存占用与行数无关
+            engine_options = {'constant_memory': True, 'strings_to_urls': False}
+            with pd.ExcelWriter(filename, engine='xlsxwriter',
+                                engine_kwargs={'options': engine_options}) as writer:
                 workbook = writer.book
                 
                 # 创建格式
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'align': 'center',
-                    'valign': 'vcenter',
-                    'fg_color': '#D9E1F2',
-                    'border': 1
-                })
-                
-                cell_format = workbook.add_format({
-                    'align': 'center',
-                    'valign': 'vcenter',
-                    'border': 1,
-                    'text_wrap': True
-                })
+                header_format = workbook.add_format(self.HEADER_FORMAT)
+                cell_format = workbook.add_format(self.CELL_FORMAT)
                 
                 # 1. 详细调度表
-                detailed_table = table_formatter.format_detailed_table(result)
                 if not detailed_table.empty:
                     self._write_formatted_sheet(writer, detailed_table, '详细调度表', 
                                               header_format, cell_format)
                 
-                # 2. 阶段汇总表
-                phase_summary = table_formatter.format_phase_summary(result)
-                if not phase_summary.empty:
+                # 2. 阶段汇总表（小表直接以行列表写入，不构建DataFrame）
+                if phase_summary[1]:
                     self._write_formatted_sheet(writer, phase_summary, '阶段汇总',
                                               header_format, cell_format)
                 
                 # 3. 测试组汇总表
-                group_summary = table_formatter.format_group_summary(result)
-                if not group_summary.empty:
+                if group_summary[1]:
                     self._write_formatted_sheet(writer, group_summary, '测试组汇总',
                                               header_format, cell_format)
                 
                 # 4. 统计信息表
                 if result.statistics:
-                    stats_df = self._create_statistics_dataframe(result.statistics)
-                    self._write_formatted_sheet(writer, stats_df, '统计信息',
+                    stats_table = self._create_statistics_rows(result.statistics)
+                    self._write_formatted_sheet(writer, stats_table, '统计信息',
                                               header_format, cell_format)
             
             print(f"调度结果已成功导出到文件：{filename}")
@@ -261,61 +384,65 @@ class ExcelExporter:
             print(f"导出Excel文件时发生错误：{str(e)}")
             return False
     
-    def _write_formatted_sheet(self, writer, dataframe: pd.DataFrame, sheet_name: str,
+    def _write_formatted_sheet(self, writer, table, sheet_name: str,
                              header_format, cell_format):
-        """写入格式化的工作表"""
-        dataframe.to_excel(writer, sheet_name=sheet_name, index=False)
-        
-        worksheet = writer.sheets[sheet_name]
-        
-        # 设置列宽
-        for col_num in range(len(dataframe.columns)):
-            # 根据内容动态调整列宽
-            max_length = max(
-                dataframe.iloc[:, col_num].astype(str).apply(len).max(),
-                len(str(dataframe.columns[col_num]))
-            )
+        """
+        写入格式化的工作表（自上而下逐行写入，兼容constant_memory模式）
+        
+        Args:
+            writer: pandas ExcelWriter（xlsxwriter引擎）
+            table: DataFrame，或 (表头列表, 行元组列表) 形式的轻量表格
+            sheet_name: 工作表名称
+            header_format: 标题行格式
+            cell_format: 数据单元格格式
+        """
+        worksheet = writer.book.add_worksheet(sheet_name)
+        
+        if isinstance(table, pd.DataFrame):
+            headers = table.columns.tolist()
+            columns = [table.iloc[:, col_num].tolist() for col_num in range(len(headers))]
+            # 一次性转换为字符串，按列用向量化的str.len()计算最大长度
+            str_frame = table.astype(str)
+            content_lengths = [str_frame.iloc[:, col_num].str.len().max() for col_num in range(len(headers))]
+        else:
+            headers, rows = table
+            columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in headers]
+            content_lengths = [max((len(str(value)) for value in column), default=0) for column in columns]
+        
+        # 设置列宽：根据内容动态调整
+        for col_num, (column, content_length) in enumerate(zip(headers, content_lengths)):
+            max_length = max(content_length, len(str(column)))
             worksheet.set_column(col_num, col_num, min(max_length + 2, 30))
         
         # 设置行高
         worksheet.set_default_row(25)
         
-        # 设置标题行格式
-        for col_num, value in enumerate(dataframe.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # 设置数据单元格格式
-        for row_num in range(len(dataframe)):
-            for col_num in range(len(dataframe.columns)):
-                cell_value = dataframe.iloc[row_num, col_num]
-                # 处理依赖项目列的换行
-                if isinstance(cell_value, str) and ',' in cell_value and col_num == len(dataframe.columns) - 1:
-                    cell_value = cell_value.replace(', ', ',\n')
-                
-                worksheet.write(row_num + 1, col_num, cell_value, cell_format)
+        # 写入标题行
+        worksheet.write_row(0, 0, list(headers), header_format)
+        
+        # 逐行写入（constant_memory模式下已写过的行不能再回写）
+        if columns:
+            # 处理依赖项目列的换行（只对最后一列做一次替换，不含', '的字符串替换后不变）
+            columns[-1] = [value.replace(', ', ',\n') if isinstance(value, str) else value
+                           for value in columns[-1]]
+        
+        for row_num, row_values in enumerate(zip(*columns), start=1):
+            worksheet.write_row(row_num, 0, row_values, cell_format)
     
-    def _create_statistics_dataframe(self, statistics: Dict[str, Any]) -> pd.DataFrame:
-        """创建统计信息的DataFrame"""
-        stats_data = []
+    def _create_statistics_rows(self, statistics: Dict[str, Any]) -> Tuple[List[str], List[tuple]]:
+        """创建统计信息的轻量表格：(表头列表, 行元组列表)"""
+        rows = []
         
         for key, value in statistics.items():
             if isinstance(value, dict):
                 # 字典类型的统计信息（如各阶段测试数量）
                 for sub_key, sub_value in value.items():
-                    stats_data.append({
-                        '统计类别': key,
-                        '项目': sub_key,
-                        '数值': sub_value
-                    })
+                    rows.append((key, sub_key, sub_value))
             else:
                 # 简单值类型的统计信息
-                stats_data.append({
-                    '统计类别': key,
-                    '项目': '',
-                    '数值': value
-                })
+                rows.append((key, '', value))
         
-        return pd.DataFrame(stats_data)
+        return ['统计类别', '项目', '数值'], rows
 
 
 class ConsoleFormatter:
@@ -350,13 +477,23 @@ class ConsoleFormatter:
         print("详细调度表格")
         print("="*60)
         
-        # 设置pandas显示选项
-        pd.set_option('display.max_columns', None)
-        pd.set_option('display.max_rows', None)
-        pd.set_option('display.width', None)
-        pd.set_option('display.max_colwidth', 30)
-        
-        print(detailed_table.to_string(index=False))
+        # 逐列转为字符串并按显示宽度补齐（中文按2列计算），完整输出单元格内容
+        # （不修改pandas全局显示选项，避免影响调用方）
+        headers = [str(column) for column in detailed_table.columns]
+        padded_headers = []
+        padded_columns = []
+        for col_num, header in enumerate(headers):
+            texts = detailed_table.iloc[:, col_num].astype(str).tolist()
+            text_widths = [display_width(text) for text in texts]
+            header_width = display_width(header)
+            width = max(header_width, max(text_widths))
+            padded_headers.append(header + ' ' * (width - header_width))
+            padded_columns.append([text + ' ' * (width - text_width)
+                                   for text, text_width in zip(texts, text_widths)])
+        
+        print('  '.join(padded_headers).rstrip())
+        for row in zip(*padded_columns):
+            print('  '.join(row).rstrip())
     
     def _print_detailed_statistics(self, statistics: Dict[str, Any]):
         """打印详细统计信息"""
@@ -384,9 +521,10 @@ class OutputManager:
     """输出管理器 - 统一管理所有输出格式"""
     
     def __init__(self, test_items: List[TestItem], dependency_graph: DependencyGraph,
-                 output_config: OutputConfig, working_time_config: WorkingTimeConfig):
+                 output_config: OutputConfig, working_time_config: WorkingTimeConfig,
+                 time_manager: Optional[WorkingTimeManager] = None):
         self.config = output_config
-        self.time_formatter = TimeFormatter(working_time_config)
+        self.time_formatter = TimeFormatter(working_time_config, time_manager)
         self.table_formatter = ScheduleTableFormatter(test_items, dependency_graph, self.time_formatter)
         self.excel_exporter = ExcelExporter(output_config)
         self.console_formatter = ConsoleFormatter(output_config)
@@ -5,7 +5,9 @@
 """
 import sys
 import os
+import io
 import json
+from itertools import groupby
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -26,29 +28,27 @@ class PracticalTestPlanGenerator:
         self.scheduler.load_data_from_file(data_file)
         result = self.scheduler.generate_sequence()
         
-        # 生成实用格式的计划
-        plan_lines = []
+        # 生成实用格式的计划：所有行写入同一个文本缓冲区
+        buffer = io.StringIO()
+        write = buffer.write
+        
+        def add_line(line: str):
+            write(line)
+            write('\n')
         
         # 标题
-        plan_lines.append("=" * 80)
-        plan_lines.append("项目验收测试执行计划")
-        plan_lines.append("=" * 80)
-        plan_lines.append("")
+        add_line("=" * 80)
+        add_line("项目验收测试执行计划")
+        add_line("=" * 80)
+        add_line("")
         
         # 说明
-        plan_lines.append("计划说明：")
-        plan_lines.append("1. 本计划按测试项优先级和依赖关系排序")
-        plan_lines.append("2. 具体执行时间由项目组根据实际情况安排")
-        plan_lines.append("3. 标注了可并行执行的测试组，可提高效率")
-        plan_lines.append("4. 必须严格按照依赖关系执行")
-        plan_lines.append("")
-        
-        # 按阶段组织测试项
-        phases = {}
-        for item in result.sequence_items:
-            if item.test_phase not in phases:
-                phases[item.test_phase] = []
-            phases[item.test_phase].append(item)
+        add_line("计划说明：")
+        add_line("1. 本计划按测试项优先级和依赖关系排序")
+        add_line("2. 具体执行时间由项目组根据实际情况安排")
+        add_line("3. 标注了可并行执行的测试组，可提高效率")
+        add_line("4. 必须严格按照依赖关系执行")
+        add_line("")
         
         # 阶段顺序
         phase_order = [
@@ -56,103 +56,117 @@ class PracticalTestPlanGenerator:
             "专项测试2（节点间互联，小场地）", 
             "专项测试3（大场地）"
         ]
+        phase_rank = {phase: i for i, phase in enumerate(phase_order)}
         
-        for phase in phase_order:
-            if phase not in phases:
-                continue
-            
-            phase_items = sorted(phases[phase], key=lambda x: x.sequence_number)
+        # 一次排序：按(阶段顺序, 序号)排列，未列入阶段顺序的测试项不输出
+        ordered_items = sorted(
+            (item for item in result.sequence_items if item.test_phase in phase_rank),
+            key=lambda x: (phase_rank[x.test_phase], x.sequence_number)
+        )
+        
+        # 预先建立 测试ID -> 并行同伴序号 的反向索引
+        parallel_peers = self._build_parallel_peers(result)
+        
+        for phase, phase_iter in groupby(ordered_items, key=lambda x: x.test_phase):
+            phase_items = list(phase_iter)
             
-            plan_lines.append(f"【{phase}】")
-            plan_lines.append("-" * 60)
+            add_line(f"【{phase}】")
+            add_line("-" * 60)
             
-            # 按测试组分组
-            groups = {}
+            # 按测试组分组：组按阶段内首次出现的顺序排列，组内保持序号顺序
+            group_rank = {}
             for item in phase_items:
-                group = item.test_group if item.test_group else "其他"
-                if group not in groups:
-                    groups[group] = []
-                groups[group].append(item)
+                group_rank.setdefault(item.test_group or "其他", len(group_rank))
+            phase_items.sort(key=lambda x: group_rank[x.test_group or "其他"])
             
-            for group_name, group_items in groups.items():
+            for group_name, group_items in groupby(phase_items, key=lambda x: x.test_group or "其他"):
                 if group_name != "其他":
-                    plan_lines.append(f"\n◆ {group_name}组测试：")
+                    add_line(f"\n◆ {group_name}组测试：")
                 else:
-                    plan_lines.append(f"\n◆ 其他测试项：")
+                    add_line(f"\n◆ 其他测试项：")
                 
-                for item in sorted(group_items, key=lambda x: x.sequence_number):
+                for item in group_items:
                     # 检查是否可并行
-                    parallel_info = self._get_parallel_info(item, result)
+                    parallel_info = parallel_peers.get(item.test_id)
                     parallel_text = f" [可与序号{parallel_info}并行]" if parallel_info else ""
                     
-                    plan_lines.append(f"  {item.sequence_number:2d}. {item.test_item}{parallel_text}")
+                    add_line(f"  {item.sequence_number:2d}. {item.test_item}{parallel_text}")
                     
                     # 添加依赖信息
                     if item.dependency_level > 0:
-                        plan_lines.append(f"      ⚠ 依赖层级{item.dependency_level}，需等待前置测试完成")
+                        add_line(f"      ⚠ 依赖层级{item.dependency_level}，需等待前置测试完成")
                     
                     # 添加资源冲突警告
                     if item.resource_conflicts:
                         conflicts = ', '.join(item.resource_conflicts[:2])
-                        plan_lines.append(f"      ⚠ 资源冲突：{conflicts}")
+                        add_line(f"      ⚠ 资源冲突：{conflicts}")
             
-            plan_lines.append("")
+            add_line("")
         
         # 并行执行建议
-        plan_lines.append("【并行执行建议】")
-        plan_lines.append("-" * 60)
-        plan_lines.append("以下测试项可同时进行，提高测试效率：")
-        plan_lines.append("")
+        add_line("【并行执行建议】")
+        add_line("-" * 60)
+        add_line("以下测试项可同时进行，提高测试效率：")
+        add_line("")
         
         parallel_count = 0
         for i, group in enumerate(result.parallel_groups, 1):
             if len(group) > 1:  # 只显示真正并行的组
                 parallel_count += 1
                 items = [result.sequence_items[idx] for idx in group]
-                plan_lines.append(f"并行组{parallel_count}：")
+                add_line(f"并行组{parallel_count}：")
                 for item in items:
-                    plan_lines.append(f"  • {item.test_item}")
-                plan_lines.append("")
+                    add_line(f"  • {item.test_item}")
+                add_line("")
         
         # 关键提醒
-        plan_lines.append("【关键提醒】")
-        plan_lines.append("-" * 60)
-        plan_lines.append("1. 必须按序号顺序执行，不可跳过")
-        plan_lines.append("2. 有依赖关系的测试项必须等待前置测试完成")
-        plan_lines.append("3. 存在资源冲突的测试项不能同时进行") 
-        plan_lines.append("4. 每个阶段内的测试可根据资源情况灵活安排")
-        plan_lines.append("5. 具体时间安排由项目组根据实际情况确定")
-        plan_lines.append("")
+        add_line("【关键提醒】")
+        add_line("-" * 60)
+        add_line("1. 必须按序号顺序执行，不可跳过")
+        add_line("2. 有依赖关系的测试项必须等待前置测试完成")
+        add_line("3. 存在资源冲突的测试项不能同时进行") 
+        add_line("4. 每个阶段内的测试可根据资源情况灵活安排")
+        add_line("5. 具体时间安排由项目组根据实际情况确定")
+        add_line("")
         
         # 统计信息
         stats = result.statistics
-        plan_lines.append("【计划统计】")
-        plan_lines.append("-" * 60)
-        plan_lines.append(f"总测试项数：{stats['总测试项数']} 项")
-        plan_lines.append(f"可并行组数：{parallel_count} 组")
-        plan_lines.append(f"最大并行度：{stats['最大并行度']} 项同时进行")
-        plan_lines.append("")
+        add_line("【计划统计】")
+        add_line("-" * 60)
+        add_line(f"总测试项数：{stats['总测试项数']} 项")
+        add_line(f"可并行组数：{parallel_count} 组")
+        add_line(f"最大并行度：{stats['最大并行度']} 项同时进行")
+        add_line("")
         
         for phase, count in stats['各阶段测试数量'].items():
             phase_short = phase.replace("专项测试", "测试")
-            plan_lines.append(f"{phase_short}：{count} 项")
+            add_line(f"{phase_short}：{count} 项")
         
-        return '\n'.join(plan_lines)
+        # 去掉最后一行多写的换行符，与逐行拼接的结果保持一致
+        return buffer.getvalue()[:-1]
     
-    def _get_parallel_info(self, item, result):
-        """获取并行信息"""
+    def _build_parallel_peers(self, result):
+        """
+        建立测试ID到并行同伴序号的反向索引
+        
+        Args:
+            result: 序列调度结果
+            
+        Returns:
+            Dict[int, str]: 测试ID -> 同组其他测试项的序号（最多显示2个，逗号分隔）
+        """
+        items = result.sequence_items
+        parallel_peers = {}
         for group in result.parallel_groups:
-            if len(group) > 1:
-                # 找到当前项在组中的位置
-                item_indices = []
-                for idx in group:
-                    if result.sequence_items[idx].test_id == item.test_id:
-                        continue
-                    item_indices.append(str(result.sequence_items[idx].sequence_number))
-                
-                if item_indices:
-                    return ','.join(item_indices[:2])  # 最多显示2个
-        return None
+            if len(group) <= 1:
+                continue
+            for idx in group:
+                peers = [str(items[j].sequence_number) for j in group
+                         if items[j].test_id != items[idx].test_id][:2]
+                if peers:
+                    # 测试项出现在多个并行组时以第一个组为准
+                    parallel_peers.setdefault(items[idx].test_id, ','.join(peers))
+        return parallel_peers
 
 
 def main():
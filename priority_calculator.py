@@ -2,13 +2,55 @@
 优先级计算模块
 负责计算测试项的调度优先级，支持多种优先级策略
 """
-from typing import List, Dict, Set, Tuple
-from collections import defaultdict
-from models import TestItem, ScheduledTest, DependencyGraph, GroupPhase, PriorityScore
+from typing import List, Dict, Set, Tuple, Optional
+from collections import Counter, defaultdict
+from itertools import chain
+import numpy as np
+from models import TestItem, ScheduledTest, DependencyGraph, GroupPhase, PriorityScore, get_group_phase
 from config import PriorityWeights, SchedulingConfig
 from constraints import ResourceMatrix
 
 
+def _priority_scores(dep_counts: np.ndarray, durations: np.ndarray, resource_load: np.ndarray,
+                     phase_rank: np.ndarray, weights: PriorityWeights) -> np.ndarray:
+    """
+    批量计算基础优先级各分项
+    
+    Args:
+        dep_counts: 各测试项的被依赖数量
+        durations: 各测试项的持续时间
+        resource_load: 各测试项的资源需求总量
+        phase_rank: 各测试项的阶段排名（数值越大越靠前）
+        weights: 优先级权重
+        
+    Returns:
+        np.ndarray: 形状为(4, N)的评分矩阵，依次为依赖、持续时间、资源、阶段评分
+    """
+    return np.stack([
+        dep_counts * weights.dependency,
+        durations * weights.duration,
+        resource_load * weights.resource,
+        phase_rank * weights.phase,
+    ])
+
+
+def _build_test_id_index(test_items: List[TestItem]) -> Dict[int, int]:
+    """构建测试ID到索引的映射，重复ID保留第一次出现的位置"""
+    test_id_to_index = {}
+    for i, item in enumerate(test_items):
+        test_id_to_index.setdefault(item.test_id, i)
+    return test_id_to_index
+
+
+def _build_group_phase_index(test_items: List[TestItem]) -> List[Optional[GroupPhase]]:
+    """按索引构建每个测试项所属的组-阶段（无有效测试组时为None）"""
+    return [
+        get_group_phase(item.test_group, item.test_phase)
+        if item.test_group and item.test_group != '无' else None
+        for item in test_items
+    ]
+
+
 class PriorityCalculator:
     """优先级计算器"""
     
@@ -21,9 +63,27 @@ class PriorityCalculator:
         self.weights = priority_weights
         self.config = config
         
+        # 测试ID到索引的映射（重复ID时取第一个，与线性查找结果一致）
+        self.test_id_to_index = _build_test_id_index(test_items)
+        # 每个测试项所属的组-阶段，按索引一次性计算
+        self.group_phase_of_idx = _build_group_phase_index(test_items)
+        
         # 创建阶段到索引的映射
         self.phases = list(set(item.test_phase for item in test_items))
         self.phase_to_index = {phase: idx for idx, phase in enumerate(self.phases)}
+        
+        # 基础优先级与时间无关，初始化时一次性批量计算
+        n = len(test_items)
+        dep_counts = np.fromiter((dependency_graph.get_dependencies_count(i) for i in range(n)),
+                                 dtype=np.int64, count=n)
+        durations = np.fromiter((item.duration for item in test_items), dtype=np.float64, count=n)
+        resource_load = resource_matrix.row_sums
+        phase_rank = len(self.phases) - np.fromiter(
+            (self.phase_to_index.get(item.test_phase, len(self.phases)) for item in test_items),
+            dtype=np.int64, count=n)
+        self.base_components = _priority_scores(dep_counts, durations, resource_load, phase_rank, priority_weights)
+        self.base_total_array = self.base_components.sum(axis=0)
+        self.base_totals = self.base_total_array.tolist()
     
     def calculate_base_priority(self, test_idx: int) -> PriorityScore:
         """
@@ -40,19 +100,8 @@ class PriorityCalculator:
         
         test_item = self.test_items[test_idx]
         
-        # 1. 依赖关系评分（被依赖的测试项优先级更高）
-        dependency_score = self.dependency_graph.get_dependencies_count(test_idx) * self.weights.dependency
-        
-        # 2. 持续时间评分（耗时长的优先级更高）
-        duration_score = test_item.duration * self.weights.duration
-        
-        # 3. 资源需求评分（资源需求多的优先级更高）
-        resource_usage = sum(self.resource_matrix.matrix[test_idx])
-        resource_score = resource_usage * self.weights.resource
-        
-        # 4. 阶段评分（前面阶段优先级更高）
-        phase_idx = self.phase_to_index.get(test_item.test_phase, len(self.phases))
-        phase_score = (len(self.phases) - phase_idx) * self.weights.phase
+        # 依赖关系、持续时间、资源需求、阶段评分均已在初始化时批量计算
+        dependency_score, duration_score, resource_score, phase_score = self.base_components[:, test_idx].tolist()
         
         return PriorityScore(
             test_id=test_item.test_id,
@@ -60,7 +109,8 @@ class PriorityCalculator:
             duration_score=duration_score,
             resource_score=resource_score,
             phase_score=phase_score,
-            continuity_score=0  # 基础优先级不包含连续性评分
+            continuity_score=0,  # 基础优先级不包含连续性评分
+            total_score=self.base_totals[test_idx]
         )
     
     def calculate_continuity_priority(self, test_idx: int, active_group_phases: Set[GroupPhase],
@@ -79,12 +129,10 @@ class PriorityCalculator:
         if test_idx >= len(self.test_items):
             return 0.0
         
-        test_item = self.test_items[test_idx]
-        if not test_item.test_group or test_item.test_group == '无':
+        group_phase = self.group_phase_of_idx[test_idx]
+        if group_phase is None:
             return 0.0
         
-        group_phase = GroupPhase(test_item.test_group, test_item.test_phase)
-        
         # 如果是活跃的组-阶段，给予连续性加分
         if group_phase in active_group_phases:
             base_continuity = self.weights.continuity
@@ -127,9 +175,8 @@ class PriorityCalculator:
         
         # 如果没有获得连续性加分，但有空闲槽位，给新组-阶段一定优先级
         if continuity_score == 0.0 and completed_group_phases:
-            test_item = self.test_items[test_idx]
-            if test_item.test_group and test_item.test_group != '无':
-                group_phase = GroupPhase(test_item.test_group, test_item.test_phase)
+            group_phase = self.group_phase_of_idx[test_idx] if test_idx < len(self.test_items) else None
+            if group_phase is not None:
                 if group_phase not in (active_group_phases or set()):
                     # 给新组-阶段适中的优先级，但低于活跃组-阶段
                     continuity_score = self.weights.continuity * 0.6
@@ -152,14 +199,33 @@ class GroupPhaseManager:
     def __init__(self, test_items: List[TestItem], config: SchedulingConfig):
         self.test_items = test_items
         self.config = config
+        self.test_id_to_index = _build_test_id_index(test_items)
+        # 每个测试项所属的组-阶段（无有效测试组时为None），按索引一次性计算
+        self.group_phase_of_idx = _build_group_phase_index(test_items)
         self.group_phase_to_tests = self._build_group_phase_mapping()
+        # 各组-阶段尚未调度的测试项数量，测试项调度成功时通过on_scheduled增量递减
+        self.remaining_counts: Counter = Counter()
+        self.reset_remaining_counts()
+    
+    def reset_remaining_counts(self):
+        """将各组-阶段的剩余测试项数量恢复为全部未调度时的状态"""
+        self.remaining_counts = Counter(
+            {group_phase: len(indices) for group_phase, indices in self.group_phase_to_tests.items()}
+        )
+    
+    def on_scheduled(self, test_idx: int):
+        """测试项调度成功后递减其组-阶段的剩余数量（归零时移除）"""
+        group_phase = self.group_phase_of_idx[test_idx]
+        if group_phase is not None and group_phase in self.remaining_counts:
+            self.remaining_counts[group_phase] -= 1
+            if self.remaining_counts[group_phase] <= 0:
+                del self.remaining_counts[group_phase]
     
     def _build_group_phase_mapping(self) -> Dict[GroupPhase, List[int]]:
         """构建组-阶段到测试项的映射"""
         mapping = defaultdict(list)
-        for i, test_item in enumerate(self.test_items):
-            if test_item.test_group and test_item.test_group != '无':
-                group_phase = GroupPhase(test_item.test_group, test_item.test_phase)
+        for i, group_phase in enumerate(self.group_phase_of_idx):
+            if group_phase is not None:
                 mapping[group_phase].append(i)
         return dict(mapping)
     
@@ -170,10 +236,14 @@ class GroupPhaseManager:
     def get_active_group_phases(self, active_tests: List[ScheduledTest]) -> Set[GroupPhase]:
         """获取当前活跃的测试组-阶段组合"""
         active_group_phases = set()
+        group_phase_of_idx = self.group_phase_of_idx
         for test in active_tests:
-            if test.test_group and test.test_group != '无':
-                group_phase = GroupPhase(test.test_group, test.test_phase)
-                active_group_phases.add(group_phase)
+            if test.test_idx is not None and test.test_idx < len(group_phase_of_idx):
+                group_phase = group_phase_of_idx[test.test_idx]
+                if group_phase is not None:
+                    active_group_phases.add(group_phase)
+            elif test.test_group and test.test_group != '无':
+                active_group_phases.add(get_group_phase(test.test_group, test.test_phase))
         return active_group_phases
     
     def get_completed_group_phases(self, active_group_phases: Set[GroupPhase], 
@@ -182,14 +252,7 @@ class GroupPhaseManager:
         all_group_phases = self.get_all_group_phases()
         
         # 获取未调度测试项的组-阶段
-        pending_group_phases = set()
-        for test_id in unscheduled_test_ids:
-            test_idx = next((i for i, item in enumerate(self.test_items) if item.test_id == test_id), None)
-            if test_idx is not None:
-                test_item = self.test_items[test_idx]
-                if test_item.test_group and test_item.test_group != '无':
-                    group_phase = GroupPhase(test_item.test_group, test_item.test_phase)
-                    pending_group_phases.add(group_phase)
+        pending_group_phases = self._pending_group_phase_counts(unscheduled_test_ids).keys()
         
         # 已完成的组-阶段 = 所有组-阶段 - 活跃组-阶段 - 有未调度测试项的组-阶段
         completed_group_phases = all_group_phases - active_group_phases - pending_group_phases
@@ -201,7 +264,8 @@ class GroupPhaseManager:
         获取最近完成的测试组-阶段组合
         
         Args:
-            scheduled_tests: 已调度的测试项
+            scheduled_tests: 已调度的测试项（也可传入SchedulingState.get_tests_completed_between
+                             预先按时间窗口筛选出的测试，结果相同）
             current_time: 当前时间
             lookback: 回溯时间窗口（小时）
             
@@ -216,7 +280,7 @@ class GroupPhaseManager:
             if (test.end_time > time_threshold and test.end_time <= current_time and
                 test.test_group and test.test_group != '无'):
                 
-                group_phase = GroupPhase(test.test_group, test.test_phase)
+                group_phase = get_group_phase(test.test_group, test.test_phase)
                 # 记录该组-阶段最大的完成时间
                 group_phase_completion_times[group_phase] = max(
                     group_phase_completion_times.get(group_phase, 0),
@@ -232,17 +296,20 @@ class GroupPhaseManager:
         
         return sorted_group_phases
     
-    def get_remaining_tests_by_group_phase(self, unscheduled_test_ids: Set[int]) -> Dict[GroupPhase, int]:
-        """获取每个组-阶段的剩余测试项数量"""
-        group_phase_remaining = defaultdict(int)
-        for test_id in unscheduled_test_ids:
-            test_idx = next((i for i, item in enumerate(self.test_items) if item.test_id == test_id), None)
-            if test_idx is not None:
-                test_item = self.test_items[test_idx]
-                if test_item.test_group and test_item.test_group != '无':
-                    group_phase = GroupPhase(test_item.test_group, test_item.test_phase)
-                    group_phase_remaining[group_phase] += 1
-        return dict(group_phase_remaining)
+    def get_remaining_tests_by_group_phase(self, unscheduled_test_ids: Optional[Set[int]] = None) -> Dict[GroupPhase, int]:
+        """获取每个组-阶段的剩余测试项数量（未提供未调度集合时直接返回增量维护的计数）"""
+        if unscheduled_test_ids is None:
+            return dict(self.remaining_counts)
+        return dict(self._pending_group_phase_counts(unscheduled_test_ids))
+    
+    def _pending_group_phase_counts(self, unscheduled_test_ids: Set[int]) -> Counter:
+        """统计未调度测试项在各组-阶段中的数量（按首次出现顺序）"""
+        get_index = self.test_id_to_index.get
+        group_phase_of_idx = self.group_phase_of_idx
+        return Counter(
+            group_phase_of_idx[idx] for idx in map(get_index, unscheduled_test_ids)
+            if idx is not None and group_phase_of_idx[idx] is not None
+        )
     
     def create_group_phase_priorities(self, active_group_phases: Set[GroupPhase],
                                     completed_group_phases: Set[GroupPhase],
@@ -260,38 +327,24 @@ class GroupPhaseManager:
         Returns:
             Dict[GroupPhase, int]: 组-阶段优先级映射（数值越小优先级越高）
         """
-        group_phase_priorities = {}
-        priority_rank = 0
-        
         # 1. 当前活跃的组-阶段（最高优先级）
-        for group_phase in active_group_phases:
-            if group_phase not in group_phase_priorities:
-                group_phase_priorities[group_phase] = priority_rank
-                priority_rank += 1
-        
         # 2. 按最近完成时间排序的组-阶段
-        for group_phase, _ in recently_completed:
-            if group_phase not in group_phase_priorities:
-                group_phase_priorities[group_phase] = priority_rank
-                priority_rank += 1
-        
         # 3. 已完成的组-阶段（中等优先级，可以开始新的组-阶段）
-        for group_phase in completed_group_phases:
-            if group_phase not in group_phase_priorities:
-                group_phase_priorities[group_phase] = priority_rank
-                priority_rank += 1
-        
-        # 4. 所有剩余组-阶段按剩余测试项数量排序（剩余少的优先）
+        # 依次串联后用dict去重，每个组-阶段保留第一次出现的位置
+        ranked = dict.fromkeys(chain(
+            active_group_phases,
+            (group_phase for group_phase, _ in recently_completed),
+            completed_group_phases
+        ))
+        
+        # 4. 所有剩余组-阶段按剩余测试项数量排序（剩余少的优先，稳定排序）
         remaining_group_phases = sorted(
-            [(gp, n) for gp, n in group_phase_remaining.items() if gp not in group_phase_priorities],
-            key=lambda x: x[1]
+            (gp for gp in group_phase_remaining if gp not in ranked),
+            key=group_phase_remaining.__getitem__
         )
         
-        for group_phase, _ in remaining_group_phases:
-            group_phase_priorities[group_phase] = priority_rank
-            priority_rank += 1
-        
-        return group_phase_priorities
+        return {group_phase: priority_rank
+                for priority_rank, group_phase in enumerate(chain(ranked, remaining_group_phases))}
 
 
 class PriorityManager:
@@ -308,21 +361,25 @@ class PriorityManager:
     def get_prioritized_tests(self, unscheduled_test_ids: Set[int], 
                             active_tests: List[ScheduledTest],
                             scheduled_tests: List[ScheduledTest],
-                            current_time: float) -> List[Tuple[int, PriorityScore]]:
+                            current_time: float,
+                            active_group_phases: Optional[Set[GroupPhase]] = None) -> List[Tuple[int, PriorityScore]]:
         """
         获取按优先级排序的测试项列表
         
         Args:
             unscheduled_test_ids: 未调度的测试项ID集合
             active_tests: 当前活跃的测试项
-            scheduled_tests: 已调度的测试项
+            scheduled_tests: 已调度的测试项（仅用于查找最近完成的组-阶段，可只传入回溯窗口内完成的测试）
             current_time: 当前时间
+            active_group_phases: 当前活跃的组-阶段（如SchedulingState.active_group_phases）；
+                                 未提供时由active_tests重新计算
             
         Returns:
             List[Tuple[int, PriorityScore]]: 按优先级排序的(测试项索引, 优先级评分)列表
         """
-        # 获取当前状态
-        active_group_phases = self.group_phase_manager.get_active_group_phases(active_tests)
+        # 获取当前状态（调用方已维护活跃组-阶段时直接复用）
+        if active_group_phases is None:
+            active_group_phases = self.group_phase_manager.get_active_group_phases(active_tests)
         completed_group_phases = self.group_phase_manager.get_completed_group_phases(
             active_group_phases, unscheduled_test_ids
         )
@@ -340,16 +397,56 @@ class PriorityManager:
         
         # 计算每个未调度测试项的优先级
         test_priorities = []
+        test_id_to_index = self.priority_calculator.test_id_to_index
         for test_id in unscheduled_test_ids:
-            test_idx = next((i for i, item in enumerate(self.priority_calculator.test_items) 
-                           if item.test_id == test_id), None)
+            test_idx = test_id_to_index.get(test_id)
             if test_idx is not None:
                 priority_score = self.priority_calculator.calculate_full_priority(
                     test_idx, active_group_phases, group_phase_priorities, completed_group_phases
                 )
                 test_priorities.append((test_idx, priority_score))
         
-        # 按总优先级排序（降序）
-        test_priorities.sort(key=lambda x: x[1].total_score, reverse=True)
+        # 按总优先级排序（降序，稳定排序保持同分项的原有顺序）
+        totals = np.fromiter((score.total_score for _, score in test_priorities),
+                             dtype=np.float64, count=len(test_priorities))
+        order = np.argsort(-totals, kind='stable')
+        
+        return [test_priorities[k] for k in order.tolist()]
+    
+    def get_prioritized_indices(self, unscheduled_test_ids: Set[int]) -> List[Tuple[int, float]]:
+        """
+        获取按优先级排序的(测试项索引, 总评分)列表，供调度热路径使用
+        
+        总评分在构造PriorityScore时即已确定（不含之后赋值的连续性评分），
+        因此直接按预先计算的基础总评分排序即可得到与get_prioritized_tests相同的顺序，
+        无需逐项构建PriorityScore对象或计算组-阶段状态。
+        
+        Args:
+            unscheduled_test_ids: 未调度的测试项ID集合
+            
+        Returns:
+            List[Tuple[int, float]]: 按优先级降序排列的(测试项索引, 总评分)列表
+        """
+        test_id_to_index = self.priority_calculator.test_id_to_index
+        indices = np.fromiter(
+            (idx for idx in map(test_id_to_index.get, unscheduled_test_ids) if idx is not None),
+            dtype=np.intp
+        )
+        return self.rank_indices(indices)
+    
+    def rank_indices(self, indices: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        按基础总评分对给定的测试项索引降序排序
+        
+        Args:
+            indices: 测试项索引数组（如未调度掩码的np.flatnonzero结果）
+            
+        Returns:
+            List[Tuple[int, float]]: 按优先级降序排列的(测试项索引, 总评分)列表，同分项保持输入顺序
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        # 整体取出评分后做降序稳定排序
+        totals = self.priority_calculator.base_total_array[indices]
+        order = np.argsort(-totals, kind='stable')
         
-        return test_priorities
\ No newline at end of file
+        return list(zip(indices[order].tolist(), totals[order].tolist()))
\ No newline at end of file
@@ -4,8 +4,10 @@
 """
 from typing import List, Set, Tuple, Optional, Dict
 import logging
+from collections import Counter
+import numpy as np
 from models import (TestItem, ScheduledTest, SchedulingState, SchedulingResult, 
-                   DependencyGraph, GroupPhase)
+                   DependencyGraph, GroupPhase, get_group_phase)
 from config import SchedulingConfig, WorkingTimeConfig
 from time_manager import WorkingTimeManager, TimeConstraintChecker
 from constraints import ConstraintChecker
@@ -17,7 +19,8 @@ class SchedulingAlgorithm:
     
     def __init__(self, test_items: List[TestItem], instruments: Dict[str, int],
                  dependency_graph: DependencyGraph, config: SchedulingConfig,
-                 working_time_config: WorkingTimeConfig, priority_manager: PriorityManager):
+                 working_time_config: WorkingTimeConfig, priority_manager: PriorityManager,
+                 time_manager: Optional[WorkingTimeManager] = None):
         self.test_items = test_items
         self.instruments = instruments
         self.dependency_graph = dependency_graph
@@ -26,8 +29,8 @@ class SchedulingAlgorithm:
         self.priority_manager = priority_manager
         
         # 初始化子组件
-        self.time_manager = WorkingTimeManager(working_time_config)
-        self.time_constraint_checker = TimeConstraintChecker(working_time_config)
+        self.time_manager = time_manager if time_manager is not None else WorkingTimeManager(working_time_config)
+        self.time_constraint_checker = TimeConstraintChecker(working_time_config, self.time_manager)
         self.constraint_checker = ConstraintChecker(
             test_items, instruments, dependency_graph, config
         )
@@ -35,6 +38,21 @@ class SchedulingAlgorithm:
         # 创建测试项ID到索引的映射
         self.test_id_to_index = {item.test_id: i for i, item in enumerate(test_items)}
         
+        # 候选项分组使用的列式数据（按测试项索引）：持续时间与组-阶段编号（无有效测试组为-1）
+        n_tests = len(test_items)
+        self._durations = np.fromiter((item.duration for item in test_items), dtype=np.float64, count=n_tests)
+        self._group_phase_code_of: Dict[GroupPhase, int] = {}
+        code_of = self._group_phase_code_of
+        self._group_phase_codes = np.fromiter(
+            (code_of.setdefault(get_group_phase(item.test_group, item.test_phase), len(code_of))
+             if item.test_group and item.test_group != '无' else -1
+             for item in test_items),
+            dtype=np.int64, count=n_tests
+        )
+        
+        # 优先级排序结果缓存：(未调度集合版本, 排序结果)，未调度集合不变时排序结果不变
+        self._prioritized_cache: Optional[Tuple[int, List[Tuple[int, float]]]] = None
+        
         # 设置日志
         self.logger = logging.getLogger(__name__)
     
@@ -47,10 +65,16 @@ class SchedulingAlgorithm:
         """
         self.logger.info("开始执行测试调度算法")
         
+        self._prioritized_cache = None
+        self.priority_manager.group_phase_manager.reset_remaining_counts()
+        
         # 初始化调度状态
         state = SchedulingState(
             current_time=0.0,
-            unscheduled_test_ids={item.test_id for item in self.test_items}
+            unscheduled_test_ids={item.test_id for item in self.test_items},
+            unscheduled_mask=np.ones(len(self.test_items), dtype=bool),
+            resource_rows=self.constraint_checker.resource_matrix.matrix,
+            completed_mask=np.zeros(len(self.test_items), dtype=bool)
         )
         
         # 主调度循环
@@ -63,7 +87,7 @@ class SchedulingAlgorithm:
             # 更新活跃测试列表
             completed_tests = state.update_active_tests(state.current_time)
             if completed_tests:
-                self.logger.debug(f"时间 {state.current_time}: 完成了 {len(completed_tests)} 个测试项")
+                self.logger.debug("时间 %s: 完成了 %d 个测试项", state.current_time, len(completed_tests))
             
             # 如果当前时间是休息日，移动到下一个工作日
             if self.time_manager.is_rest_day(state.current_time):
@@ -82,7 +106,7 @@ class SchedulingAlgorithm:
         
         # 计算调度结果
         result = self._create_scheduling_result(state)
-        self.logger.info(f"调度算法完成，共调度 {len(result.scheduled_tests)} 个测试项")
+        self.logger.info("调度算法完成，共调度 %d 个测试项", len(result.scheduled_tests))
         
         return result
     
@@ -101,17 +125,31 @@ class SchedulingAlgorithm:
         # 获取当前工作日剩余时间
         remaining_hours = self.time_manager.get_remaining_hours_in_day(state.current_time)
         
-        # 获取按优先级排序的测试项
-        prioritized_tests = self.priority_manager.get_prioritized_tests(
-            state.unscheduled_test_ids,
-            state.active_tests,
-            state.scheduled_tests,
-            state.current_time
-        )
+        # 获取按优先级排序的测试项（直接使用预先计算的基础总评分排序）；
+        # 排序只取决于未调度集合，集合未变化的时间点直接复用上次结果
+        cache = self._prioritized_cache
+        if cache is not None and cache[0] == state.unscheduled_version:
+            prioritized_tests = cache[1]
+        else:
+            if state.unscheduled_mask is not None:
+                # 未调度测试项按索引顺序连续取出，同分项按索引顺序排列
+                prioritized_tests = self.priority_manager.rank_indices(np.flatnonzero(state.unscheduled_mask))
+            else:
+                prioritized_tests = self.priority_manager.get_prioritized_indices(state.unscheduled_test_ids)
+            self._prioritized_cache = (state.unscheduled_version, prioritized_tests)
+        
+        # 批量剔除当前时间点必然无法满足约束的测试项
+        if prioritized_tests:
+            candidate_idx = np.fromiter((test_idx for test_idx, _ in prioritized_tests),
+                                        dtype=np.intp, count=len(prioritized_tests))
+            feasible = self.constraint_checker.feasible_mask(candidate_idx, state)
+            if feasible.any():
+                feasible[feasible] = self._start_time_ok_mask(candidate_idx[feasible], state.current_time)
+            prioritized_tests = [entry for entry, ok in zip(prioritized_tests, feasible.tolist()) if ok]
         
         # 将测试项按类型分组
         eligible_groups = self._categorize_eligible_tests(
-            prioritized_tests, state.active_tests, remaining_hours
+            prioritized_tests, state, remaining_hours
         )
         
         # 按优先级顺序尝试调度
@@ -124,73 +162,81 @@ class SchedulingAlgorithm:
         
         return scheduled_count
     
+    def _start_time_ok_mask(self, candidate_idx: np.ndarray, current_time: float) -> np.ndarray:
+        """
+        批量检查候选测试项能否在当前时间开始
+        
+        最优开始时间只取决于当前时间和持续时间，因此每种持续时间只需计算一次，
+        再按索引映射回各候选项。
+        
+        Args:
+            candidate_idx: 候选测试项索引数组
+            current_time: 当前时间
+            
+        Returns:
+            np.ndarray: 布尔数组，True表示最优开始时间就是当前时间
+        """
+        unique_durations, inverse = np.unique(self._durations[candidate_idx], return_inverse=True)
+        get_optimal_start_time = self.time_constraint_checker.get_optimal_start_time
+        start_ok = np.fromiter(
+            (get_optimal_start_time(current_time, duration) <= current_time
+             for duration in unique_durations.tolist()),
+            dtype=bool, count=len(unique_durations)
+        )
+        return start_ok[inverse]
+    
     def _categorize_eligible_tests(self, prioritized_tests: List[Tuple[int, any]], 
-                                 active_tests: List[ScheduledTest], 
+                                 state: SchedulingState, 
                                  remaining_hours: float) -> List[List[Tuple[int, any]]]:
         """
         将测试项按优先级类型分组
         
         Args:
             prioritized_tests: 按优先级排序的测试项
-            active_tests: 当前活跃测试项
+            state: 调度状态（提供活跃测试项及增量维护的活跃组-阶段）
             remaining_hours: 当前工作日剩余时间
             
         Returns:
             List[List[Tuple[int, any]]]: 分组后的测试项列表
         """
-        # 获取当前活跃的组-阶段
-        active_group_phases = set()
-        for test in active_tests:
-            if test.test_group and test.test_group != '无':
-                group_phase = GroupPhase(test.test_group, test.test_phase)
-                active_group_phases.add(group_phase)
-        
-        # 分组
-        active_group_tests = []      # 活跃组-阶段的测试项（最高优先级）
-        new_group_tests = []         # 新组-阶段的测试项（中等优先级）
-        other_tests = []             # 其他测试项（最低优先级）
-        
-        available_slots = self.config.max_parallel - len(active_tests)
-        
-        for test_idx, priority_score in prioritized_tests:
-            test_item = self.test_items[test_idx]
-            test_duration = test_item.duration
-            
-            # 检查测试时长与工作日剩余时间
-            is_eligible = True
-            if test_duration <= self.working_time_config.short_test_threshold:
-                # 短测试项只有在剩余时间足够时才考虑调度
-                if test_duration > remaining_hours:
-                    is_eligible = False
-            
-            if not is_eligible:
-                continue
-            
-            # 按组-阶段类型分组
-            if test_item.test_group and test_item.test_group != '无':
-                group_phase = GroupPhase(test_item.test_group, test_item.test_phase)
-                
-                if group_phase in active_group_phases:
-                    # 活跃组-阶段测试项
-                    active_group_tests.append((test_idx, priority_score))
-                elif available_slots > 0:
-                    # 新组-阶段测试项（需要有空闲槽位）
-                    new_group_tests.append((test_idx, priority_score))
-                else:
-                    # 没有空闲槽位的新组测试项
-                    other_tests.append((test_idx, priority_score))
-            else:
-                # 无组测试项
-                other_tests.append((test_idx, priority_score))
+        if not prioritized_tests:
+            return []
+        
+        ranked_idx = np.fromiter((test_idx for test_idx, _ in prioritized_tests),
+                                 dtype=np.intp, count=len(prioritized_tests))
+        
+        # 检查测试时长与工作日剩余时间：短测试项只有在剩余时间足够时才考虑调度
+        durations = self._durations[ranked_idx]
+        eligible = ~((durations <= self.working_time_config.short_test_threshold) &
+                     (durations > remaining_hours))
+        
+        # 按组-阶段类型分组：当前活跃的组-阶段由调度状态增量维护，映射为按编号的布尔表后直接查表
+        # （表末位对应无有效测试组的编号-1，恒为False）
+        codes = self._group_phase_codes[ranked_idx]
+        code_of = self._group_phase_code_of
+        active_table = np.zeros(len(code_of) + 1, dtype=bool)
+        active_table[[code_of[gp] for gp in state.active_group_phases if gp in code_of]] = True
+        has_group = codes >= 0
+        in_active = active_table[codes]
+        
+        available_slots = self.config.max_parallel - len(state.active_tests)
+        
+        # 活跃组-阶段的测试项（最高优先级）
+        active_mask = eligible & in_active
+        if available_slots > 0:
+            # 新组-阶段测试项（需要有空闲槽位，中等优先级）；无组测试项最低
+            new_mask = eligible & has_group & ~in_active
+            other_mask = eligible & ~has_group
+        else:
+            # 没有空闲槽位时，新组测试项与无组测试项同属最低优先级
+            new_mask = None
+            other_mask = eligible & ~in_active
         
-        # 返回优先级排序的分组
+        # 返回优先级排序的分组（各组内保持优先级顺序）
         groups = []
-        if active_group_tests:
-            groups.append(active_group_tests)
-        if new_group_tests:
-            groups.append(new_group_tests)
-        if other_tests:
-            groups.append(other_tests)
+        for mask in (active_mask, new_mask, other_mask):
+            if mask is not None and mask.any():
+                groups.append([prioritized_tests[k] for k in np.flatnonzero(mask).tolist()])
         
         return groups
     
@@ -230,22 +276,14 @@ class SchedulingAlgorithm:
         """
         test_item = self.test_items[test_idx]
         
-        # 检查时间约束
-        optimal_start_time = self.time_constraint_checker.get_optimal_start_time(
-            state.current_time, test_item.duration
-        )
-        
-        # 如果最优开始时间不是当前时间，跳过
-        if optimal_start_time > state.current_time:
-            return False
-        
-        # 检查所有约束
+        # 时间约束（最优开始时间为当前时间）已由 _start_time_ok_mask 在候选项预筛选时批量检查；
+        # 同一时间点内该结果不变，这里只需检查其余约束
         can_schedule, failed_constraints = self.constraint_checker.check_all_constraints(
             test_idx, state.current_time, state
         )
         
         if not can_schedule:
-            self.logger.debug(f"测试项 {test_item.test_item} 无法调度: {failed_constraints}")
+            self.logger.debug("测试项 %s 无法调度: %s", test_item.test_item, failed_constraints)
             return False
         
         # 创建调度的测试项
@@ -256,14 +294,16 @@ class SchedulingAlgorithm:
             test_phase=test_item.test_phase,
             start_time=state.current_time,
             duration=test_item.duration,
-            end_time=state.current_time + test_item.duration
+            end_time=state.current_time + test_item.duration,
+            test_idx=test_idx
         )
         
         # 添加到调度状态
         state.add_scheduled_test(scheduled_test)
+        self.priority_manager.group_phase_manager.on_scheduled(test_idx)
         
-        self.logger.debug(f"成功调度测试项: {test_item.test_item} "
-                         f"(开始时间: {state.current_time}, 持续时间: {test_item.duration})")
+        self.logger.debug("成功调度测试项: %s (开始时间: %s, 持续时间: %s)",
+                          test_item.test_item, state.current_time, test_item.duration)
         
         return True
     
@@ -310,7 +350,7 @@ class SchedulingAlgorithm:
         
         return SchedulingResult(
             scheduled_tests=state.scheduled_tests.copy(),
-            total_duration=max(test.end_time for test in state.scheduled_tests) if state.scheduled_tests else 0.0,
+            total_duration=state.makespan if state.scheduled_tests else 0.0,
             statistics=statistics
         )
     
@@ -327,24 +367,14 @@ class SchedulingAlgorithm:
         if not state.scheduled_tests:
             return {}
         
-        total_duration = max(test.end_time for test in state.scheduled_tests)
-        
-        # 按阶段统计
-        phase_stats = {}
-        for test in state.scheduled_tests:
-            phase = test.test_phase
-            if phase not in phase_stats:
-                phase_stats[phase] = 0
-            phase_stats[phase] += 1
-        
-        # 按测试组统计
-        group_stats = {}
-        for test in state.scheduled_tests:
-            if test.test_group and test.test_group != '无':
-                group = test.test_group
-                if group not in group_stats:
-                    group_stats[group] = 0
-                group_stats[group] += 1
+        total_duration = state.makespan
+        
+        # 按阶段、测试组统计（Counter按首次出现顺序计数）
+        phase_stats = dict(Counter(test.test_phase for test in state.scheduled_tests))
+        group_stats = dict(Counter(
+            test.test_group for test in state.scheduled_tests
+            if test.test_group and test.test_group != '无'
+        ))
         
         # 计算平均并行度
         if total_duration > 0:
@@ -352,8 +382,14 @@ class SchedulingAlgorithm:
         else:
             avg_parallelism = 0.0
         
-        # 计算资源利用率
-        resource_utilization = self._calculate_resource_utilization(state.scheduled_tests)
+        # 计算资源利用率：已调度测试项直接取自列式存储（结束时间非inf的索引）
+        if state.end_time_by_idx is not None:
+            scheduled_idx = np.flatnonzero(state.end_time_by_idx != np.inf)
+            resource_utilization = self._calculate_utilization_from_columns(
+                scheduled_idx, self._durations[scheduled_idx], total_duration
+            )
+        else:
+            resource_utilization = self._calculate_resource_utilization(state.scheduled_tests, total_duration)
         
         return {
             '总测试项数': len(state.scheduled_tests),
@@ -366,12 +402,14 @@ class SchedulingAlgorithm:
             '资源利用率': resource_utilization
         }
     
-    def _calculate_resource_utilization(self, scheduled_tests: List[ScheduledTest]) -> Dict[str, float]:
+    def _calculate_resource_utilization(self, scheduled_tests: List[ScheduledTest],
+                                        total_duration: Optional[float] = None) -> Dict[str, float]:
         """
         计算资源利用率
         
         Args:
             scheduled_tests: 已调度的测试项
+            total_duration: 总完工时间（调用方已知时传入，省去再次遍历求最大值）
             
         Returns:
             Dict[str, float]: 各资源的利用率
@@ -379,17 +417,38 @@ class SchedulingAlgorithm:
         if not scheduled_tests:
             return {}
         
-        total_duration = max(test.end_time for test in scheduled_tests)
-        resource_usage_time = {instrument: 0.0 for instrument in self.instruments.keys()}
-        
-        # 计算每个资源的使用时间
+        if total_duration is None:
+            total_duration = max(test.end_time for test in scheduled_tests)
+        # 计算每个资源的使用时间：使用矩阵(测试项×仪器)的转置与持续时间向量相乘
+        test_indices, durations = [], []
+        get_index = self.test_id_to_index.get
         for test in scheduled_tests:
-            test_idx = self.test_id_to_index.get(test.test_id)
+            test_idx = get_index(test.test_id)
             if test_idx is not None:
-                resource_usage = self.constraint_checker.resource_matrix.get_resource_usage(test_idx)
-                for instrument, usage in resource_usage.items():
-                    if usage > 0:
-                        resource_usage_time[instrument] += test.duration
+                test_indices.append(test_idx)
+                durations.append(test.duration)
+        
+        return self._calculate_utilization_from_columns(
+            np.asarray(test_indices, dtype=np.intp), np.asarray(durations, dtype=np.float64), total_duration
+        )
+    
+    def _calculate_utilization_from_columns(self, test_indices: np.ndarray, durations: np.ndarray,
+                                            total_duration: float) -> Dict[str, float]:
+        """
+        由列式数据计算资源利用率
+        
+        Args:
+            test_indices: 已调度测试项的索引
+            durations: 对应的持续时间
+            total_duration: 总完工时间
+            
+        Returns:
+            Dict[str, float]: 各资源的利用率
+        """
+        resource_matrix = self.constraint_checker.resource_matrix
+        used = resource_matrix.matrix[test_indices] > 0
+        usage_times = (used.T.astype(np.float64) @ durations).tolist()
+        resource_usage_time = dict(zip(resource_matrix.instrument_names, usage_times))
         
         # 计算利用率
         utilization = {}
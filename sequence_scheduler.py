@@ -5,20 +5,35 @@
 """
 import sys
 import os
-from typing import List, Dict, Set, Tuple, Optional
+from typing import List, Dict, Set, Tuple, Optional, Union, Iterable, Iterator
 from dataclasses import dataclass
-from collections import defaultdict
-import json
+from collections import Counter, deque
+from functools import wraps
+import numpy as np
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from models import TestItem, DependencyGraph, DataValidator
-from config import ConfigManager
+from models import TestItem, DependencyGraph, DataValidator, _SLOTS
+from config import ConfigManager, load_json_file
 from constraints import ResourceMatrix
 
 
-@dataclass
+def _memoized(method):
+    """缓存无参数分析方法的结果（加载数据或调用invalidate_caches时失效）；调用方不应修改返回的对象"""
+    name = method.__name__
+    
+    @wraps(method)
+    def wrapper(self):
+        cache = self._analysis_cache
+        if name not in cache:
+            cache[name] = method(self)
+        return cache[name]
+    
+    return wrapper
+
+
+@dataclass(**_SLOTS)
 class SequenceItem:
     """序列项 - 不包含具体时间"""
     sequence_number: int        # 执行序号
@@ -31,7 +46,7 @@ class SequenceItem:
     resource_conflicts: List[str]  # 资源冲突项
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SequenceResult:
     """序列化结果"""
     sequence_items: List[SequenceItem]
@@ -40,6 +55,60 @@ class SequenceResult:
     statistics: Dict[str, any]
 
 
+def _build_parallel_groups(order: np.ndarray, conflict_mat: np.ndarray, dep_mat: np.ndarray,
+                           group_id: np.ndarray, max_parallel: int) -> List[List[int]]:
+    """
+    按序列顺序贪心生成并行组（只使用整数/布尔数组）
+    
+    Args:
+        order: 各序列位置对应的测试项索引
+        conflict_mat: 测试项间的资源冲突矩阵（按测试项索引）
+        dep_mat: 测试项间的依赖关系矩阵（按测试项索引，双向）
+        group_id: 各序列位置的测试组编号（无有效测试组为-1）
+        max_parallel: 并行组大小上限
+        
+    Returns:
+        List[List[int]]: 并行组（元素为序列位置）
+    """
+    # 换算到序列位置上，后续按行取用
+    conflict_seq = conflict_mat[np.ix_(order, order)]
+    dep_seq = dep_mat[np.ix_(order, order)]
+    used = np.zeros(len(order), dtype=bool)
+    parallel_groups = []
+    
+    for i in range(len(order)):
+        if used[i]:
+            continue
+        used[i] = True
+        current_group = [i]
+        
+        # 与当前项存在资源冲突、依赖关系或同属一个测试组的项不能并行
+        blocked = conflict_seq[i] | dep_seq[i] | used
+        if group_id[i] >= 0:
+            blocked |= group_id == group_id[i]
+        blocked[:i + 1] = True
+        
+        # 依次加入候选项，同时不能与组内已有成员存在资源冲突
+        member_conflicts = conflict_seq[i].copy()
+        add_member = current_group.append
+        group_size = 1
+        for j in np.flatnonzero(~blocked).tolist():
+            if member_conflicts[j]:
+                continue
+            add_member(j)
+            used[j] = True
+            member_conflicts |= conflict_seq[j]
+            
+            # 限制并行组大小
+            group_size += 1
+            if group_size >= max_parallel:
+                break
+        
+        parallel_groups.append(current_group)
+    
+    return parallel_groups
+
+
 class SequenceScheduler:
     """序列化调度器"""
     
@@ -49,22 +118,33 @@ class SequenceScheduler:
         self.instruments: Dict[str, int] = {}
         self.dependency_graph = DependencyGraph()
         self.resource_matrix: Optional[ResourceMatrix] = None
+        self._id_to_idx: Dict[int, int] = {}  # 测试ID -> 测试项索引（重复ID取第一个）
+        self._analysis_cache: Dict[str, object] = {}  # 依赖层级、优先级评分、资源冲突的计算结果
     
     def load_data_from_file(self, data_file: str):
         """从文件加载数据"""
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file(data_file)
         
+        self.load_data_from_dict(
+            data.get('test_items', []), data.get('instruments', {}), data.get('dependencies', {})
+        )
+    
+    def load_data_from_dict(self, test_data: List[Dict], instruments: Dict[str, int],
+                            dependencies: Dict[str, List[str]] = None):
+        """
+        从字典数据加载测试项、仪器和依赖关系
+        
+        Args:
+            test_data: 测试项数据列表
+            instruments: 仪器字典
+            dependencies: 依赖关系字典
+        """
         # 转换测试项数据
-        self.test_items = []
-        for item_data in data.get('test_items', []):
-            test_item = TestItem(**item_data)
-            self.test_items.append(test_item)
+        self.test_items = [TestItem(**item_data) for item_data in test_data]
         
-        self.instruments = data.get('instruments', {})
+        self.instruments = instruments
         
         # 设置依赖关系
-        dependencies = data.get('dependencies', {})
         if dependencies:
             self.dependency_graph.dependencies = dependencies.copy()
         
@@ -74,95 +154,144 @@ class SequenceScheduler:
         # 创建资源矩阵
         self.resource_matrix = ResourceMatrix(self.test_items, self.instruments)
         
+        # 测试ID到索引的映射，加载时一次性构建
+        self._id_to_idx = {}
+        for idx, test in enumerate(self.test_items):
+            self._id_to_idx.setdefault(test.test_id, idx)
+        
+        self.invalidate_caches()
+        
         print(f"加载完成: {len(self.test_items)}个测试项")
     
+    def invalidate_caches(self):
+        """清空分析结果缓存（直接修改test_items、依赖关系或仪器数据后调用）"""
+        self._analysis_cache.clear()
+    
+    @_memoized
     def calculate_dependency_levels(self) -> Dict[int, int]:
         """计算每个测试项的依赖层级"""
         n = len(self.test_items)
+        graph = self.dependency_graph
+        if graph.n_tests != n:
+            return self._calculate_dependency_levels_dfs()
+        
+        # Kahn拓扑遍历：从无前置依赖的测试项出发，沿"被依赖"边(CSC)逐层传播层级
+        remaining = np.diff(graph.out_indptr).tolist()
+        in_indptr = graph.in_indptr.tolist()
+        in_indices = graph.in_indices.tolist()
+        levels = [0] * n
+        queue = deque(i for i in range(n) if remaining[i] == 0)
+        processed = 0
+        while queue:
+            u = queue.popleft()
+            processed += 1
+            next_level = levels[u] + 1
+            for v in in_indices[in_indptr[u]:in_indptr[u + 1]]:
+                if levels[v] < next_level:
+                    levels[v] = next_level
+                remaining[v] -= 1
+                if remaining[v] == 0:
+                    queue.append(v)
+        
+        # 依赖关系存在环时拓扑遍历无法覆盖全部测试项，改用深度优先遍历
+        if processed < n:
+            return self._calculate_dependency_levels_dfs()
+        
+        return dict(enumerate(levels))
+    
+    def _calculate_dependency_levels_dfs(self) -> Dict[int, int]:
+        """深度优先计算依赖层级（显式栈代替递归；环上回访的测试项按层级0计）"""
+        n = len(self.test_items)
+        get_prerequisites = self.dependency_graph.get_prerequisites
         levels = {}
         visited = set()
         
-        def dfs(test_idx: int) -> int:
-            if test_idx in visited:
-                return levels.get(test_idx, 0)
-            
-            visited.add(test_idx)
-            max_dep_level = 0
-            
-            # 查找所有依赖项
-            for j in range(n):
-                if self.dependency_graph.dependency_matrix[test_idx][j] == 1:
-                    dep_level = dfs(j)
-                    max_dep_level = max(max_dep_level, dep_level + 1)
-            
-            levels[test_idx] = max_dep_level
-            return max_dep_level
-        
-        # 计算所有测试项的层级
-        for i in range(n):
-            if i not in levels:
-                dfs(i)
+        for root in range(n):
+            if root in levels:
+                continue
+            visited.add(root)
+            # 栈元素: [测试项索引, 剩余依赖迭代器, 当前最大依赖层级]
+            stack = [[root, iter(get_prerequisites(root).tolist()), 0]]
+            while stack:
+                frame = stack[-1]
+                for j in frame[1]:
+                    if j in visited:
+                        frame[2] = max(frame[2], levels.get(j, 0) + 1)
+                    else:
+                        visited.add(j)
+                        stack.append([j, iter(get_prerequisites(j).tolist()), 0])
+                        break
+                else:
+                    stack.pop()
+                    levels[frame[0]] = frame[2]
+                    if stack:
+                        stack[-1][2] = max(stack[-1][2], frame[2] + 1)
         
         return levels
     
+    @_memoized
     def calculate_priority_scores(self) -> Dict[int, float]:
         """计算优先级评分（不依赖时间）"""
         n = len(self.test_items)
-        scores = {}
         
         # 获取阶段顺序
         phases = list(set(item.test_phase for item in self.test_items))
         phase_to_index = {phase: idx for idx, phase in enumerate(phases)}
         
-        for i, test_item in enumerate(self.test_items):
-            score = 0.0
-            
-            # 1. 依赖关系评分（被依赖的测试项优先级更高）
-            dep_count = sum(self.dependency_graph.dependency_matrix[j][i] for j in range(n))
-            score += dep_count * 10
-            
-            # 2. 资源复杂度评分（资源需求多的优先级更高）
-            resource_usage = sum(self.resource_matrix.matrix[i])
-            score += resource_usage * 5
-            
-            # 3. 阶段评分（前面阶段优先级更高）
-            phase_idx = phase_to_index.get(test_item.test_phase, len(phases))
-            score += (len(phases) - phase_idx) * 20
-            
-            # 4. 测试组连续性（同组测试项优先级相近）
-            if test_item.test_group and test_item.test_group != '无':
-                # 给有测试组的项目额外加分，促进组内连续性
-                score += 15
-            
-            scores[i] = score
+        # 1. 依赖关系评分（被依赖的测试项优先级更高）
+        in_degree = self.dependency_graph.in_degree
+        dep_counts = np.zeros(n, dtype=np.float64)
+        dep_counts[:min(n, in_degree.size)] = in_degree[:n]
+        
+        # 2. 资源复杂度评分（资源需求多的优先级更高）
+        resource_usage = self.resource_matrix.row_sums
+        
+        # 3. 阶段评分（前面阶段优先级更高）
+        phase_idx = np.fromiter((phase_to_index.get(item.test_phase, len(phases)) for item in self.test_items),
+                                dtype=np.int64, count=n)
         
-        return scores
+        # 4. 测试组连续性（给有测试组的项目额外加分，促进组内连续性）
+        has_group = np.fromiter((bool(item.test_group) and item.test_group != '无' for item in self.test_items),
+                                dtype=bool, count=n)
+        
+        scores = dep_counts * 10 + resource_usage * 5 + (len(phases) - phase_idx) * 20 + has_group * 15
+        return dict(enumerate(scores.tolist()))
     
+    @_memoized
     def find_resource_conflicts(self) -> Dict[int, List[int]]:
         """找出资源冲突的测试项"""
+        return self._conflict_lists(self._resource_conflict_matrix())
+    
+    @staticmethod
+    def _conflict_lists(conflict: np.ndarray) -> Dict[int, List[int]]:
+        """将资源冲突矩阵转换为 测试项索引 -> 冲突测试项索引列表（升序）"""
+        return {i: np.flatnonzero(conflict[i]).tolist() for i in np.flatnonzero(conflict.any(axis=1)).tolist()}
+    
+    @_memoized
+    def _resource_conflict_matrix(self) -> np.ndarray:
+        """计算测试项间的资源冲突矩阵（按测试项索引，conflict[i, j]为True表示i与j资源冲突）"""
         n = len(self.test_items)
-        conflicts = defaultdict(list)
-        
-        for i in range(n):
-            for j in range(i + 1, n):
-                # 检查是否有资源冲突
-                has_conflict = False
-                for k in range(len(self.resource_matrix.instrument_names)):
-                    if (self.resource_matrix.matrix[i][k] > 0 and 
-                        self.resource_matrix.matrix[j][k] > 0):
-                        # 需要相同资源，检查是否超出容量
-                        total_needed = (self.resource_matrix.matrix[i][k] + 
-                                      self.resource_matrix.matrix[j][k])
-                        available = list(self.instruments.values())[k]
-                        if total_needed > available:
-                            has_conflict = True
-                            break
-                
-                if has_conflict:
-                    conflicts[i].append(j)
-                    conflicts[j].append(i)
-        
-        return dict(conflicts)
+        matrix = self.resource_matrix.matrix
+        capacities = self.resource_matrix.capacities
+        conflict = np.zeros((n, n), dtype=bool)
+        
+        # 一次性取出各仪器的使用者（按仪器分段，段内按测试项索引升序），跳过使用者不足两个的仪器
+        instrument_of, users_all = np.nonzero(matrix.T > 0)
+        bounds = np.searchsorted(instrument_of, np.arange(matrix.shape[1] + 1))
+        
+        # 逐仪器计算两两冲突：只在使用该仪器的测试项之间比较需求之和是否超出容量
+        for k in np.flatnonzero(np.diff(bounds) >= 2).tolist():
+            users = users_all[bounds[k]:bounds[k + 1]]
+            demand = matrix[users, k]
+            # 与需求最大者相加都不超出容量的测试项不可能冲突，直接剔除
+            involved = demand > capacities[k] - demand.max()
+            if np.count_nonzero(involved) < 2:
+                continue
+            users, demand = users[involved], demand[involved]
+            conflict[np.ix_(users, users)] |= (demand[:, None] + demand[None, :]) > capacities[k]
+        np.fill_diagonal(conflict, False)
+        
+        return conflict
     
     def generate_sequence(self) -> SequenceResult:
         """生成测试执行序列"""
@@ -171,29 +300,25 @@ class SequenceScheduler:
         # 计算依赖层级和优先级
         dependency_levels = self.calculate_dependency_levels()
         priority_scores = self.calculate_priority_scores()
+        conflict_mat = self._resource_conflict_matrix()
         resource_conflicts = self.find_resource_conflicts()
         
-        # 创建排序用的元组列表: (依赖层级, -优先级分数, 测试索引)
-        sort_items = []
-        for i in range(n):
-            sort_items.append((
-                dependency_levels.get(i, 0),    # 依赖层级越低越优先
-                -priority_scores.get(i, 0),     # 优先级分数越高越优先
-                i                               # 测试索引
-            ))
-        
-        # 排序：先按依赖层级，再按优先级
-        sort_items.sort()
+        # 排序：先按依赖层级（越低越优先），再按优先级分数（越高越优先），同分按测试索引
+        levels = np.fromiter((dependency_levels.get(i, 0) for i in range(n)), dtype=np.int64, count=n)
+        scores = np.fromiter((priority_scores.get(i, 0) for i in range(n)), dtype=np.float64, count=n)
+        order = np.lexsort((-scores, levels))
         
         # 生成序列项
         sequence_items = []
-        for seq_num, (dep_level, neg_priority, test_idx) in enumerate(sort_items, 1):
-            test_item = self.test_items[test_idx]
+        level_list = levels.tolist()
+        test_items = self.test_items
+        get_conflicts = resource_conflicts.get
+        for seq_num, test_idx in enumerate(order.tolist(), 1):
+            dep_level = level_list[test_idx]
+            test_item = test_items[test_idx]
             
             # 获取资源冲突的测试项名称
-            conflict_names = []
-            for conflict_idx in resource_conflicts.get(test_idx, []):
-                conflict_names.append(self.test_items[conflict_idx].test_item)
+            conflict_names = [test_items[conflict_idx].test_item for conflict_idx in get_conflicts(test_idx, ())]
             
             sequence_item = SequenceItem(
                 sequence_number=seq_num,
@@ -209,7 +334,7 @@ class SequenceScheduler:
             sequence_items.append(sequence_item)
         
         # 生成并行组（基于资源不冲突的原则）
-        parallel_groups = self._generate_parallel_groups(sequence_items, resource_conflicts)
+        parallel_groups = self._generate_parallel_groups(sequence_items, conflict_mat)
         
         # 计算阶段边界
         phase_boundaries = self._calculate_phase_boundaries(sequence_items)
@@ -225,86 +350,58 @@ class SequenceScheduler:
         )
     
     def _generate_parallel_groups(self, sequence_items: List[SequenceItem], 
-                                resource_conflicts: Dict[int, List[int]]) -> List[List[int]]:
-        """生成可并行执行的测试组"""
-        parallel_groups = []
-        used_items = set()
+                                resource_conflicts: Union[np.ndarray, Dict[int, List[int]]]) -> List[List[int]]:
+        """
+        生成可并行执行的测试组
         
-        for i, item in enumerate(sequence_items):
-            if i in used_items:
-                continue
-            
-            # 找出与当前项可并行的项
-            current_group = [i]
-            used_items.add(i)
-            
-            # 获取当前项的测试索引
-            current_test_idx = next(
-                idx for idx, test in enumerate(self.test_items) 
-                if test.test_id == item.test_id
-            )
-            
-            for j, other_item in enumerate(sequence_items[i+1:], i+1):
-                if j in used_items:
-                    continue
-                
-                # 获取其他项的测试索引
-                other_test_idx = next(
-                    idx for idx, test in enumerate(self.test_items) 
-                    if test.test_id == other_item.test_id
-                )
-                
-                # 检查是否可以并行
-                can_parallel = True
-                
-                # 1. 检查资源冲突
-                if other_test_idx in resource_conflicts.get(current_test_idx, []):
-                    can_parallel = False
-                
-                # 2. 检查依赖关系
-                if (self.dependency_graph.dependency_matrix[other_test_idx][current_test_idx] == 1 or
-                    self.dependency_graph.dependency_matrix[current_test_idx][other_test_idx] == 1):
-                    can_parallel = False
-                
-                # 3. 检查测试组约束（同组不能并行）
-                if (item.test_group and other_item.test_group and 
-                    item.test_group == other_item.test_group and
-                    item.test_group != '无'):
-                    can_parallel = False
-                
-                # 4. 检查与已在组内的其他项是否冲突
-                for group_member_idx in current_group:
-                    group_member_test_idx = next(
-                        idx for idx, test in enumerate(self.test_items) 
-                        if test.test_id == sequence_items[group_member_idx].test_id
-                    )
-                    if other_test_idx in resource_conflicts.get(group_member_test_idx, []):
-                        can_parallel = False
-                        break
-                
-                if can_parallel:
-                    current_group.append(j)
-                    used_items.add(j)
-                    
-                    # 限制并行组大小
-                    if len(current_group) >= self.config_manager.scheduling.max_parallel:
-                        break
+        Args:
+            sequence_items: 序列项
+            resource_conflicts: 资源冲突矩阵，或 测试项索引 -> 冲突测试项索引列表
             
-            if current_group:
-                parallel_groups.append(current_group)
+        Returns:
+            List[List[int]]: 并行组（元素为序列位置）
+        """
+        n = len(self.test_items)
+        
+        id_to_idx = self._id_to_idx
+        order = np.fromiter((id_to_idx[item.test_id] for item in sequence_items),
+                            dtype=np.intp, count=len(sequence_items))
+        
+        # 资源冲突矩阵（传入列表形式时转换为矩阵）
+        if isinstance(resource_conflicts, np.ndarray):
+            conflict_mat = resource_conflicts
+        else:
+            conflict_mat = np.zeros((n, n), dtype=bool)
+            for test_idx, conflict_indices in resource_conflicts.items():
+                conflict_mat[test_idx, conflict_indices] = True
+        
+        # 依赖关系矩阵（任一方向存在依赖即不能并行）
+        graph = self.dependency_graph
+        dep_mat = np.zeros((n, n), dtype=bool)
+        if graph.n_tests == n and len(graph.out_indices):
+            dep_mat[np.repeat(np.arange(n), np.diff(graph.out_indptr)), graph.out_indices] = True
+        dep_mat |= dep_mat.T
+        
+        # 测试组编号（同组不能并行，无有效测试组为-1）
+        group_codes = {}
+        group_id = np.fromiter(
+            (group_codes.setdefault(item.test_group, len(group_codes))
+             if item.test_group and item.test_group != '无' else -1
+             for item in sequence_items),
+            dtype=np.int64, count=len(sequence_items)
+        )
         
-        return parallel_groups
+        return _build_parallel_groups(order, conflict_mat, dep_mat, group_id,
+                                      self.config_manager.scheduling.max_parallel)
     
     def _calculate_phase_boundaries(self, sequence_items: List[SequenceItem]) -> Dict[str, Tuple[int, int]]:
-        """计算各阶段的起止序号"""
+        """计算各阶段的起止序号（序列项按序号递增，单次遍历即可，阶段按首次出现顺序排列）"""
         phase_boundaries = {}
         
-        for phase in set(item.test_phase for item in sequence_items):
-            phase_items = [item for item in sequence_items if item.test_phase == phase]
-            if phase_items:
-                min_seq = min(item.sequence_number for item in phase_items)
-                max_seq = max(item.sequence_number for item in phase_items)
-                phase_boundaries[phase] = (min_seq, max_seq)
+        for item in sequence_items:
+            bounds = phase_boundaries.get(item.test_phase)
+            seq_num = item.sequence_number
+            phase_boundaries[item.test_phase] = (seq_num if bounds is None else bounds[0], seq_num)
         
         return phase_boundaries
     
@@ -313,30 +410,23 @@ class SequenceScheduler:
         """计算统计信息"""
         stats = {}
         
-        # 基本统计
+        # 基本统计（并行组大小只求一次）
+        group_sizes = [len(group) for group in parallel_groups]
         stats['总测试项数'] = len(sequence_items)
         stats['并行组数'] = len(parallel_groups)
-        stats['最大并行度'] = max(len(group) for group in parallel_groups) if parallel_groups else 0
-        stats['平均并行度'] = sum(len(group) for group in parallel_groups) / len(parallel_groups) if parallel_groups else 0
+        stats['最大并行度'] = max(group_sizes, default=0)
+        stats['平均并行度'] = sum(group_sizes) / len(group_sizes) if group_sizes else 0
         
-        # 阶段统计
-        phase_stats = defaultdict(int)
+        # 阶段、测试组、依赖层级统计：单次遍历同时计数（Counter按首次出现顺序）
+        phase_stats, group_stats, level_stats = Counter(), Counter(), Counter()
         for item in sequence_items:
             phase_stats[item.test_phase] += 1
-        stats['各阶段测试数量'] = dict(phase_stats)
-        
-        # 测试组统计
-        group_stats = defaultdict(int)
-        for item in sequence_items:
             if item.test_group and item.test_group != '无':
                 group_stats[item.test_group] += 1
+            level_stats[item.dependency_level] += 1
+        stats['各阶段测试数量'] = dict(phase_stats)
         stats['各测试组测试数量'] = dict(group_stats)
-        
-        # 依赖层级统计
-        level_stats = defaultdict(int)
-        for item in sequence_items:
-            level_stats[f"层级{item.dependency_level}"] += 1
-        stats['依赖层级分布'] = dict(level_stats)
+        stats['依赖层级分布'] = {f"层级{level}": count for level, count in level_stats.items()}
         
         return stats
 
@@ -344,19 +434,24 @@ class SequenceScheduler:
 class SequenceFormatter:
     """序列结果格式化器"""
     
-    def format_sequence_table(self, result: SequenceResult) -> str:
-        """格式化序列表格"""
-        lines = []
-        lines.append("=" * 120)
-        lines.append("测试执行序列")
-        lines.append("=" * 120)
+    def __init__(self):
+        # 最近一次准备的 (序列结果, 表格行数据)，同一结果多次格式化时复用
+        self._cache: Optional[Tuple[SequenceResult, List[Tuple[int, int, str, str, str, int, str]]]] = None
+    
+    def _prepare(self, result: SequenceResult) -> List[Tuple[int, int, str, str, str, int, str]]:
+        """
+        一次性准备序列表格各行的显示字段
         
-        # 表头
-        header = f"{'序号':<4} {'测试ID':<6} {'阶段':<8} {'测试组':<12} {'测试项目':<30} {'依赖层级':<6} {'资源冲突':<20}"
-        lines.append(header)
-        lines.append("-" * 120)
+        Args:
+            result: 序列化结果
+            
+        Returns:
+            List[Tuple[int, int, str, str, str, int, str]]: (序号, 测试ID, 阶段简写, 测试组, 测试项目, 依赖层级, 资源冲突)
+        """
+        if self._cache is not None and self._cache[0] is result:
+            return self._cache[1]
         
-        # 数据行
+        rows = []
         for item in result.sequence_items:
             conflicts = ', '.join(item.resource_conflicts[:2])  # 只显示前2个冲突
             if len(item.resource_conflicts) > 2:
@@ -366,59 +461,93 @@ class SequenceFormatter:
             group_short = item.test_group[:10] if item.test_group else "无"
             item_short = item.test_item[:28]
             
-            row = f"{item.sequence_number:<4} {item.test_id:<6} {phase_short:<8} {group_short:<12} {item_short:<30} {item.dependency_level:<6} {conflicts:<20}"
-            lines.append(row)
+            rows.append((item.sequence_number, item.test_id, phase_short, group_short, item_short,
+                         item.dependency_level, conflicts))
         
-        return '\n'.join(lines)
+        self._cache = (result, rows)
+        return rows
     
-    def format_parallel_groups(self, result: SequenceResult) -> str:
-        """格式化并行组信息"""
-        lines = []
-        lines.append("\n" + "=" * 80)
-        lines.append("可并行执行的测试组")
-        lines.append("=" * 80)
+    def iter_sequence_table(self, result: SequenceResult) -> Iterator[str]:
+        """逐行生成序列表格"""
+        yield "=" * 120
+        yield "测试执行序列"
+        yield "=" * 120
+        
+        # 表头
+        header = f"{'序号':<4} {'测试ID':<6} {'阶段':<8} {'测试组':<12} {'测试项目':<30} {'依赖层级':<6} {'资源冲突':<20}"
+        yield header
+        yield "-" * 120
+        
+        # 数据行
+        for sequence_number, test_id, phase_short, group_short, item_short, dependency_level, conflicts in self._prepare(result):
+            row = f"{sequence_number:<4} {test_id:<6} {phase_short:<8} {group_short:<12} {item_short:<30} {dependency_level:<6} {conflicts:<20}"
+            yield row
+    
+    def format_sequence_table(self, result: SequenceResult) -> str:
+        """格式化序列表格"""
+        return '\n'.join(self.iter_sequence_table(result))
+    
+    def iter_parallel_groups(self, result: SequenceResult) -> Iterator[str]:
+        """逐行生成并行组信息"""
+        yield "\n" + "=" * 80
+        yield "可并行执行的测试组"
+        yield "=" * 80
         
         for i, group in enumerate(result.parallel_groups, 1):
             if len(group) > 1:  # 只显示真正并行的组
-                lines.append(f"\n并行组 {i} (可同时执行 {len(group)} 项):")
+                yield f"\n并行组 {i} (可同时执行 {len(group)} 项):"
                 for item_idx in group:
                     item = result.sequence_items[item_idx]
-                    lines.append(f"  - 序号{item.sequence_number}: {item.test_item}")
-        
-        return '\n'.join(lines)
+                    yield f"  - 序号{item.sequence_number}: {item.test_item}"
     
-    def format_phase_summary(self, result: SequenceResult) -> str:
-        """格式化阶段汇总"""
-        lines = []
-        lines.append("\n" + "=" * 80)
-        lines.append("各阶段执行范围")
-        lines.append("=" * 80)
+    def format_parallel_groups(self, result: SequenceResult) -> str:
+        """格式化并行组信息"""
+        return '\n'.join(self.iter_parallel_groups(result))
+    
+    def iter_phase_summary(self, result: SequenceResult) -> Iterator[str]:
+        """逐行生成阶段汇总"""
+        yield "\n" + "=" * 80
+        yield "各阶段执行范围"
+        yield "=" * 80
         
         for phase, (start, end) in result.phase_boundaries.items():
             phase_short = phase.replace("专项测试", "测试")
-            lines.append(f"{phase_short}: 序号 {start} - {end}")
-        
-        return '\n'.join(lines)
+            yield f"{phase_short}: 序号 {start} - {end}"
     
-    def format_statistics(self, result: SequenceResult) -> str:
-        """格式化统计信息"""
-        lines = []
-        lines.append("\n" + "=" * 80)
-        lines.append("统计信息")
-        lines.append("=" * 80)
+    def format_phase_summary(self, result: SequenceResult) -> str:
+        """格式化阶段汇总"""
+        return '\n'.join(self.iter_phase_summary(result))
+    
+    def iter_statistics(self, result: SequenceResult) -> Iterator[str]:
+        """逐行生成统计信息"""
+        yield "\n" + "=" * 80
+        yield "统计信息"
+        yield "=" * 80
         
         stats = result.statistics
-        lines.append(f"总测试项数: {stats['总测试项数']}")
-        lines.append(f"并行组数: {stats['并行组数']}")
-        lines.append(f"最大并行度: {stats['最大并行度']}")
-        lines.append(f"平均并行度: {stats['平均并行度']:.2f}")
+        yield f"总测试项数: {stats['总测试项数']}"
+        yield f"并行组数: {stats['并行组数']}"
+        yield f"最大并行度: {stats['最大并行度']}"
+        yield f"平均并行度: {stats['平均并行度']:.2f}"
         
-        lines.append(f"\n各阶段测试数量:")
+        yield f"\n各阶段测试数量:"
         for phase, count in stats['各阶段测试数量'].items():
             phase_short = phase.replace("专项测试", "测试")
-            lines.append(f"  {phase_short}: {count}项")
-        
-        return '\n'.join(lines)
+            yield f"  {phase_short}: {count}项"
+    
+    def format_statistics(self, result: SequenceResult) -> str:
+        """格式化统计信息"""
+        return '\n'.join(self.iter_statistics(result))
+    
+    @staticmethod
+    def write_lines(f, lines: Iterable[str]):
+        """逐行写入文件（行间以换行分隔、末尾不追加换行，与'\\n'.join的结果一致）"""
+        first = True
+        for line in lines:
+            if not first:
+                f.write('\n')
+            f.write(line)
+            first = False
 
 
 def main():
@@ -438,20 +567,18 @@ def main():
         # 格式化输出
         formatter = SequenceFormatter()
         
-        print(formatter.format_sequence_table(result))
-        print(formatter.format_parallel_groups(result))
-        print(formatter.format_phase_summary(result))
-        print(formatter.format_statistics(result))
+        sections = (formatter.iter_sequence_table, formatter.iter_parallel_groups,
+                    formatter.iter_phase_summary, formatter.iter_statistics)
+        for iter_section in sections:
+            print(*iter_section(result), sep='\n')
         
-        # 保存结果到文件
+        # 保存结果到文件（各部分逐行写入，不拼接整份报告）
         output_file = "test_execution_sequence.txt"
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write("测试执行序列报告\n")
             f.write("=" * 80 + "\n\n")
-            f.write(formatter.format_sequence_table(result))
-            f.write(formatter.format_parallel_groups(result))
-            f.write(formatter.format_phase_summary(result))
-            f.write(formatter.format_statistics(result))
+            for iter_section in sections:
+                formatter.write_lines(f, iter_section(result))
         
         print(f"\n序列化结果已保存到: {output_file}")
         print("\n🎯 优势:")
@@ -9,7 +9,35 @@ import json
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from sequence_scheduler import SequenceScheduler
+from sequence_scheduler import SequenceScheduler, SequenceFormatter
+
+
+def _iter_plan_lines(result):
+    """逐行生成保存到文件的简化执行计划"""
+    yield "项目验收测试执行顺序计划"
+    yield "=" * 40
+    yield ""
+    yield "说明：本计划按优先级和依赖关系排序，不依赖具体时间估计"
+    yield ""
+    
+    for i, item in enumerate(result.sequence_items, 1):
+        phase_short = item.test_phase.replace("专项测试", "阶段")
+        yield f"{i:2d}. {item.test_item}"
+        yield f"    阶段: {phase_short}"
+        yield f"    测试组: {item.test_group}"
+        if item.dependency_level > 0:
+            yield f"    依赖层级: {item.dependency_level}"
+        yield ""
+    
+    yield "并行执行建议："
+    yield "-" * 20
+    for i, group in enumerate(result.parallel_groups):
+        if len(group) > 1:
+            items = [result.sequence_items[idx] for idx in group]
+            yield f"并行组{i+1}:"
+            for item in items:
+                yield f"  - {item.test_item}"
+            yield ""
 
 
 def generate_simple_plan():
@@ -74,36 +102,9 @@ def generate_simple_plan():
         print("3. 并行组内的测试可同时进行")
         print("4. 具体时间安排根据实际情况确定")
         
-        # 保存简化版本到文件
-        plan_content = []
-        plan_content.append("项目验收测试执行顺序计划")
-        plan_content.append("=" * 40)
-        plan_content.append("")
-        plan_content.append("说明：本计划按优先级和依赖关系排序，不依赖具体时间估计")
-        plan_content.append("")
-        
-        for i, item in enumerate(result.sequence_items, 1):
-            phase_short = item.test_phase.replace("专项测试", "阶段")
-            plan_content.append(f"{i:2d}. {item.test_item}")
-            plan_content.append(f"    阶段: {phase_short}")
-            plan_content.append(f"    测试组: {item.test_group}")
-            if item.dependency_level > 0:
-                plan_content.append(f"    依赖层级: {item.dependency_level}")
-            plan_content.append("")
-        
-        plan_content.append("并行执行建议：")
-        plan_content.append("-" * 20)
-        for i, group in enumerate(result.parallel_groups):
-            if len(group) > 1:
-                items = [result.sequence_items[idx] for idx in group]
-                plan_content.append(f"并行组{i+1}:")
-                for item in items:
-                    plan_content.append(f"  - {item.test_item}")
-                plan_content.append("")
-        
-        # 写入文件
+        # 保存简化版本到文件（逐行写入）
         with open("test_execution_plan.txt", 'w', encoding='utf-8') as f:
-            f.write('\n'.join(plan_content))
+            SequenceFormatter.write_lines(f, _iter_plan_lines(result))
         
         print(f"\n详细计划已保存到: test_execution_plan.txt")
         
@@ -5,6 +5,7 @@
 import sys
 import os
 import time
+import traceback
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -77,7 +78,6 @@ def test_basic_data_models():
         
     except Exception as e:
         print(f"✗ 数据模型测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -146,7 +146,6 @@ def test_time_management():
         
     except Exception as e:
         print(f"✗ 时间管理测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -183,14 +182,37 @@ def test_constraints():
         
         # 测试基本约束检查
         state = SchedulingState(current_time=0)
-        can_schedule, reasons = checker.check_all_constraints(0, 0, state)
+        can_schedule, reasons = checker.check_all_constraints(0, 0, state, collect_reasons=True)
         print(f"✓ 约束检查完成: {can_schedule}")
         
+        # 活跃测试没有test_idx时不能只依赖位图，仍需检查出同组冲突
+        same_group_items = [
+            TestItem(1, "阶段1", "组1", "测试1", "设备1", "无", 2),
+            TestItem(2, "阶段1", "组1", "测试2", "设备2", "无", 3),
+        ]
+        same_group_graph = DependencyGraph()
+        same_group_graph.build_matrix(same_group_items)
+        same_group_checker = ConstraintChecker(same_group_items, {}, same_group_graph, config)
+        active = ScheduledTest(test_id=1, test_item="测试1", test_group="组1", test_phase="阶段1",
+                               start_time=0, duration=2, end_time=2)
+        state = SchedulingState(current_time=0, active_tests=[active])
+        can_schedule, reasons = same_group_checker.check_all_constraints(1, 0, state)
+        assert not can_schedule, "无索引的活跃测试应触发测试组约束"
+        print(f"✓ 无索引活跃测试的组约束检查正确: {reasons}")
+        
+        # 增量资源占用不包含无索引的活跃测试，此时应逐项累计
+        active = ScheduledTest(test_id=1, test_item="测试1", test_group="组1", test_phase="阶段1",
+                               start_time=0, duration=2, end_time=2)
+        state = SchedulingState(current_time=0, active_tests=[active],
+                                resource_rows=checker.resource_matrix.matrix)
+        can_schedule, reasons = checker.check_all_constraints(1, 0, state)
+        assert not can_schedule, "无索引的活跃测试应占用仪器资源"
+        print(f"✓ 无索引活跃测试的资源约束检查正确: {reasons}")
+        
         return True
         
     except Exception as e:
         print(f"✗ 约束检查测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -6,6 +6,7 @@ import sys
 import os
 import time
 import json
+import traceback
 from typing import Dict, Any
 
 # 添加当前目录到Python路径
@@ -54,7 +55,6 @@ def test_basic_functionality():
         
     except Exception as e:
         print(f"✗ 基本功能测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -100,7 +100,6 @@ def test_compatibility():
         
     except Exception as e:
         print(f"✗ 兼容性测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
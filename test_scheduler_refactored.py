@@ -3,16 +3,37 @@
 整合所有模块，提供简洁的调度接口
 """
 import logging
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict, Mapping, Optional, Tuple
+from dataclasses import astuple
+from types import MappingProxyType
 import os
 
 from models import TestItem, DependencyGraph, SchedulingResult, DataValidator
-from config import ConfigManager
+from config import ConfigManager, load_json_file
 from constraints import ResourceMatrix, ConstraintChecker
 from priority_calculator import PriorityManager
 from scheduling_algorithm import SchedulingAlgorithm
 from output_formatter import OutputManager
+from time_manager import WorkingTimeManager
+
+
+def _to_test_item(item_data) -> TestItem:
+    """
+    将一条测试项数据转换为TestItem
+    
+    Args:
+        item_data: 测试项数据（字典，或兼容原有格式的至少7个元素的元组/列表）
+        
+    Returns:
+        TestItem: 测试项
+    """
+    if isinstance(item_data, dict):
+        # 字典格式
+        return TestItem(**item_data)
+    if isinstance(item_data, (list, tuple)) and len(item_data) >= 7:
+        # 兼容原有的元组格式（前7个元素与TestItem字段顺序一致，按位置构造）
+        return TestItem(*item_data[:7])
+    raise ValueError(f"不支持的测试项数据格式: {type(item_data)}")
 
 
 class TestScheduler:
@@ -39,7 +60,7 @@ class TestScheduler:
         
         # 数据容器
         self.test_items: List[TestItem] = []
-        self.instruments: Dict[str, int] = {}
+        self.instruments: Mapping[str, int] = MappingProxyType({})
         self.dependency_graph = DependencyGraph()
         
         # 核心组件（延迟初始化）
@@ -49,7 +70,10 @@ class TestScheduler:
         self.scheduling_algorithm: Optional[SchedulingAlgorithm] = None
         self.output_manager: Optional[OutputManager] = None
         
-        self._initialized = False
+        # 组件缓存键（None表示需要重新初始化组件）
+        self._component_key: Optional[Tuple] = None
+        # 上次记录到日志的验证结果（None表示当前数据尚未验证），结果不变时不重复记录
+        self._validation_errors: Optional[List[str]] = None
     
     def load_data_from_dict(self, test_data: List, instruments: Dict[str, int], 
                            dependencies: Dict[str, List[str]] = None):
@@ -61,30 +85,13 @@ class TestScheduler:
             instruments: 仪器字典
             dependencies: 依赖关系字典
         """
+        self._validation_errors = None
         try:
             # 转换测试项数据
-            self.test_items = []
-            for item_data in test_data:
-                if isinstance(item_data, (list, tuple)) and len(item_data) >= 7:
-                    # 兼容原有的元组格式
-                    test_item = TestItem(
-                        test_id=item_data[0],
-                        test_phase=item_data[1],
-                        test_group=item_data[2],
-                        test_item=item_data[3],
-                        required_equipment=item_data[4],
-                        required_instruments=item_data[5],
-                        duration=item_data[6]
-                    )
-                elif isinstance(item_data, dict):
-                    # 字典格式
-                    test_item = TestItem(**item_data)
-                else:
-                    raise ValueError(f"不支持的测试项数据格式: {type(item_data)}")
-                
-                self.test_items.append(test_item)
+            self.test_items = [_to_test_item(item_data) for item_data in test_data]
             
-            self.instruments = instruments.copy()
+            # 仪器字典只读共享给各组件（组件缓存期间不会被原地修改）
+            self.instruments = MappingProxyType(dict(instruments))
             
             # 设置依赖关系
             if dependencies:
@@ -97,14 +104,14 @@ class TestScheduler:
             self.dependency_graph.build_matrix(self.test_items)
             
             # 标记需要重新初始化组件
-            self._initialized = False
+            self._component_key = None
             
-            self.logger.info(f"成功加载 {len(self.test_items)} 个测试项, "
-                           f"{len(self.instruments)} 种仪器, "
-                           f"{len(self.dependency_graph.dependencies)} 个依赖关系")
+            self.logger.info("成功加载 %d 个测试项, %d 种仪器, %d 个依赖关系",
+                             len(self.test_items), len(self.instruments),
+                             len(self.dependency_graph.dependencies))
             
         except Exception as e:
-            self.logger.error(f"加载数据失败: {e}")
+            self.logger.error("加载数据失败: %s", e)
             raise
     
     def load_data_from_file(self, data_file: str):
@@ -115,8 +122,7 @@ class TestScheduler:
             data_file: 数据文件路径
         """
         try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_json_file(data_file)
             
             test_data = data.get('test_items', [])
             instruments = data.get('instruments', {})
@@ -125,7 +131,7 @@ class TestScheduler:
             self.load_data_from_dict(test_data, instruments, dependencies)
             
         except Exception as e:
-            self.logger.error(f"从文件加载数据失败: {e}")
+            self.logger.error("从文件加载数据失败: %s", e)
             raise
     
     def solve_schedule(self, max_parallel: int = None, output_filename: str = None) -> SchedulingResult:
@@ -219,13 +225,17 @@ class TestScheduler:
         self.config_manager.save_to_file(config_file)
     
     def _initialize_components(self):
-        """初始化各个组件"""
-        if self._initialized:
+        """初始化各个组件（数据与构建时固化的配置未变化时复用已有组件）"""
+        component_key = self._build_component_key()
+        if component_key == self._component_key:
             return
         
         if not self.test_items:
             raise ValueError("没有加载测试项数据")
         
+        # 调度算法与输出共享同一个工作时间管理器
+        time_manager = WorkingTimeManager(self.config_manager.working_time)
+        
         # 创建资源矩阵
         self.resource_matrix = ResourceMatrix(self.test_items, self.instruments)
         
@@ -245,47 +255,54 @@ class TestScheduler:
         self.scheduling_algorithm = SchedulingAlgorithm(
             self.test_items, self.instruments, self.dependency_graph,
             self.config_manager.scheduling, self.config_manager.working_time,
-            self.priority_manager
+            self.priority_manager, time_manager
         )
         
         # 创建输出管理器
         self.output_manager = OutputManager(
             self.test_items, self.dependency_graph,
-            self.config_manager.output, self.config_manager.working_time
+            self.config_manager.output, self.config_manager.working_time, time_manager
         )
         
-        self._initialized = True
+        self._component_key = component_key
         self.logger.info("所有组件初始化完成")
     
-    def _validate_data(self) -> List[str]:
-        """验证数据有效性"""
-        errors = []
-        
-        # 验证测试项
-        test_errors = DataValidator.validate_test_items(self.test_items)
-        errors.extend(test_errors)
+    def _build_component_key(self) -> Tuple:
+        """
+        构建组件缓存键
         
-        # 验证仪器
-        instrument_errors = DataValidator.validate_instruments(self.instruments)
-        errors.extend(instrument_errors)
+        max_parallel等调度参数在运行时从共享的配置对象读取，参数扫描时无需重建组件；
+        优先级权重在构建PriorityManager时已计算进基础分数，需作为键的一部分
         
-        # 验证依赖关系
-        dependency_errors = DataValidator.validate_dependencies(
-            self.dependency_graph.dependencies, self.test_items
+        Returns:
+            Tuple: 组件缓存键
+        """
+        return astuple(self.config_manager.priority_weights)
+    
+    def _validate_data(self) -> List[str]:
+        """验证数据有效性（每次都重新验证当前数据，结果与上次相同时不重复记录日志）"""
+        # 一次性验证测试项、仪器和依赖关系
+        errors = DataValidator.validate_all(
+            self.test_items, self.instruments, self.dependency_graph.dependencies
         )
-        errors.extend(dependency_errors)
+        
+        if errors == self._validation_errors:
+            return errors
         
         if errors:
-            self.logger.warning(f"数据验证发现 {len(errors)} 个问题")
+            self.logger.warning("数据验证发现 %d 个问题", len(errors))
             for error in errors:
-                self.logger.warning(f"  - {error}")
+                self.logger.warning("  - %s", error)
         else:
             self.logger.info("数据验证通过")
         
+        self._validation_errors = list(errors)
         return errors
     
     def _setup_logging(self):
-        """设置日志"""
+        """设置日志（根日志器已配置处理器时跳过，避免多次实例化时重复打开日志文件）"""
+        if logging.getLogger().handlers:
+            return
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -2,7 +2,7 @@
 时间管理模块
 负责处理工作日历、时间格式转换、跨天检查等时间相关逻辑
 """
-from typing import Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import math
 from config import WorkingTimeConfig
 
@@ -23,8 +23,8 @@ class WorkingTimeManager:
         Returns:
             bool: 是否为休息日
         """
-        work_days = self.get_work_day_number(hours)
-        return work_days % self.config.rest_day_cycle == 0
+        config = self.config
+        return (int(hours / config.hours_per_day) + 1) % config.rest_day_cycle == 0
     
     def get_work_day_number(self, hours: float) -> int:
         """
@@ -48,7 +48,8 @@ class WorkingTimeManager:
         Returns:
             float: 剩余小时数
         """
-        return self.config.hours_per_day - (hours % self.config.hours_per_day)
+        hours_per_day = self.config.hours_per_day
+        return hours_per_day - (hours % hours_per_day)
     
     def will_cross_day(self, start_hours: float, duration: float) -> bool:
         """
@@ -61,8 +62,8 @@ class WorkingTimeManager:
         Returns:
             bool: 是否跨天
         """
-        remaining_hours = self.get_remaining_hours_in_day(start_hours)
-        return duration > remaining_hours
+        hours_per_day = self.config.hours_per_day
+        return duration > hours_per_day - (start_hours % hours_per_day)
     
     def will_cross_rest_day(self, start_hours: float, duration: float) -> bool:
         """
@@ -75,15 +76,17 @@ class WorkingTimeManager:
         Returns:
             bool: 是否跨越休息日
         """
-        end_hours = start_hours + duration
-        start_day = self.get_work_day_number(start_hours)
-        end_day = self.get_work_day_number(end_hours)
+        hours_per_day = self.config.hours_per_day
+        start_day = int(start_hours / hours_per_day) + 1
+        end_day = int((start_hours + duration) / hours_per_day) + 1
         
-        # 检查期间的每一天
-        for day in range(start_day, end_day + 1):
-            if day % self.config.rest_day_cycle == 0:  # 是休息日
-                return True
-        return False
+        # [start_day, end_day] 内存在休息日（天数为周期的倍数）等价于区间内倍数个数大于0
+        return self._count_rest_days(start_day, end_day) > 0
+    
+    def _count_rest_days(self, start_day: int, end_day: int) -> int:
+        """统计 [start_day, end_day] 内的休息日数量（闭式计算，区间为空时为0）"""
+        cycle = self.config.rest_day_cycle
+        return max(0, end_day // cycle - (start_day - 1) // cycle)
     
     def get_next_working_day_start(self, hours: float) -> float:
         """
@@ -95,12 +98,14 @@ class WorkingTimeManager:
         Returns:
             float: 下一个工作日的开始时间（小时）
         """
-        current_day = self.get_work_day_number(hours)
-        next_day_start = current_day * self.config.hours_per_day
+        config = self.config
+        hours_per_day = config.hours_per_day
+        current_day = int(hours / hours_per_day) + 1
+        next_day_start = current_day * hours_per_day
         
         # 如果下一天是休息日，跳过该天
-        if self.is_rest_day(next_day_start):
-            next_day_start += self.config.hours_per_day
+        if (int(next_day_start / hours_per_day) + 1) % config.rest_day_cycle == 0:
+            next_day_start += hours_per_day
         
         return next_day_start
     
@@ -153,22 +158,32 @@ class WorkingTimeManager:
         start_day = self.get_work_day_number(start_hours)
         end_day = self.get_work_day_number(end_hours)
         
-        rest_days = 0
-        for day in range(start_day, end_day + 1):
-            if day % self.config.rest_day_cycle == 0:
-                rest_days += 1
+        rest_days = self._count_rest_days(start_day, end_day)
         
         # 减去休息日的时间
         working_duration = total_duration - (rest_days * self.config.hours_per_day)
         return max(0.0, working_duration)
 
 
+def _as_list(values: Iterable[float]) -> list:
+    """将NumPy数组/Series转换为Python标量列表，其余可迭代对象原样转为列表"""
+    to_list = getattr(values, 'tolist', None)
+    return to_list() if to_list is not None else list(values)
+
+
 class TimeFormatter:
     """时间格式化器"""
     
-    def __init__(self, config: WorkingTimeConfig):
+    # 单个格式化缓存的最大条目数
+    CACHE_SIZE = 4096
+    
+    def __init__(self, config: WorkingTimeConfig, time_manager: Optional[WorkingTimeManager] = None):
         self.config = config
-        self.time_manager = WorkingTimeManager(config)
+        # 可传入已有的工作时间管理器以便多个组件共享，未传入时自行创建
+        self.time_manager = time_manager if time_manager is not None else WorkingTimeManager(config)
+        # 格式化结果缓存：键包含hours_per_day，配置被修改后不会命中旧结果
+        self._time_cache: Dict[Tuple[float, float], str] = {}
+        self._duration_cache: Dict[Tuple[float, float], str] = {}
     
     def format_time(self, hours: float) -> str:
         """
@@ -180,13 +195,19 @@ class TimeFormatter:
         Returns:
             str: 格式化的时间字符串
         """
-        work_day = self.time_manager.get_work_day_number(hours)
-        hour_in_day = hours % self.config.hours_per_day
-        
-        # 转换为具体小时（8点开始工作）
-        actual_hour = 8 + hour_in_day
-        
-        return f"第{work_day}天{actual_hour:.1f}点"
+        key = (hours, self.config.hours_per_day)
+        text = self._time_cache.get(key)
+        if text is None:
+            work_day = self.time_manager.get_work_day_number(hours)
+            hour_in_day = hours % self.config.hours_per_day
+            
+            # 转换为具体小时（8点开始工作）
+            actual_hour = 8 + hour_in_day
+            
+            text = f"第{work_day}天{actual_hour:.1f}点"
+            if len(self._time_cache) < self.CACHE_SIZE:
+                self._time_cache[key] = text
+        return text
     
     def format_duration(self, duration_hours: float) -> str:
         """
@@ -198,16 +219,48 @@ class TimeFormatter:
         Returns:
             str: 格式化的持续时间字符串
         """
-        if duration_hours < 1:
-            return f"{duration_hours * 60:.0f}分钟"
-        elif duration_hours < self.config.hours_per_day:
-            return f"{duration_hours:.1f}小时"
-        else:
-            days = duration_hours / self.config.hours_per_day
-            if days == int(days):
-                return f"{int(days)}天"
+        key = (duration_hours, self.config.hours_per_day)
+        text = self._duration_cache.get(key)
+        if text is None:
+            if duration_hours < 1:
+                text = f"{duration_hours * 60:.0f}分钟"
+            elif duration_hours < self.config.hours_per_day:
+                text = f"{duration_hours:.1f}小时"
             else:
-                return f"{days:.1f}天"
+                days = duration_hours / self.config.hours_per_day
+                if days == int(days):
+                    text = f"{int(days)}天"
+                else:
+                    text = f"{days:.1f}天"
+            if len(self._duration_cache) < self.CACHE_SIZE:
+                self._duration_cache[key] = text
+        return text
+    
+    def format_times(self, values: Iterable[float]) -> List[str]:
+        """
+        批量格式化时间点
+        
+        Args:
+            values: 小时数序列（列表或NumPy数组）
+            
+        Returns:
+            List[str]: 与输入一一对应的格式化时间字符串
+        """
+        format_time = self.format_time
+        return [format_time(v) for v in _as_list(values)]
+    
+    def format_durations(self, values: Iterable[float]) -> List[str]:
+        """
+        批量格式化持续时间
+        
+        Args:
+            values: 持续时间序列（列表或NumPy数组）
+            
+        Returns:
+            List[str]: 与输入一一对应的格式化持续时间字符串
+        """
+        format_duration = self.format_duration
+        return [format_duration(v) for v in _as_list(values)]
     
     def format_time_range(self, start_hours: float, end_hours: float) -> str:
         """
@@ -230,9 +283,15 @@ class TimeFormatter:
 class TimeConstraintChecker:
     """时间约束检查器"""
     
-    def __init__(self, config: WorkingTimeConfig):
+    # 最优开始时间缓存的最大条目数
+    CACHE_SIZE = 4096
+    
+    def __init__(self, config: WorkingTimeConfig, time_manager: Optional[WorkingTimeManager] = None):
         self.config = config
-        self.time_manager = WorkingTimeManager(config)
+        # 可传入已有的工作时间管理器以便多个组件共享，未传入时自行创建
+        self.time_manager = time_manager if time_manager is not None else WorkingTimeManager(config)
+        # 最优开始时间缓存：键包含相关配置项，配置被修改后不会命中旧结果
+        self._optimal_start_cache: Dict[Tuple[float, float, float, int, float], float] = {}
     
     def can_schedule_at_time(self, start_time: float, duration: float) -> Tuple[bool, str]:
         """
@@ -245,18 +304,20 @@ class TimeConstraintChecker:
         Returns:
             Tuple[bool, str]: (是否可以调度, 原因)
         """
+        time_manager = self.time_manager
+        
         # 检查是否在休息日开始
-        if self.time_manager.is_rest_day(start_time):
+        if time_manager.is_rest_day(start_time):
             return False, "不能在休息日开始测试"
         
         # 检查是否会跨越休息日
-        if self.time_manager.will_cross_rest_day(start_time, duration):
+        if time_manager.will_cross_rest_day(start_time, duration):
             return False, "测试不能跨越休息日"
         
         # 检查短测试项是否跨天
-        if (duration <= self.config.short_test_threshold and 
-            self.time_manager.will_cross_day(start_time, duration)):
-            return False, f"小于{self.config.short_test_threshold}小时的测试不能跨天"
+        short_test_threshold = self.config.short_test_threshold
+        if duration <= short_test_threshold and time_manager.will_cross_day(start_time, duration):
+            return False, f"小于{short_test_threshold}小时的测试不能跨天"
         
         return True, "可以调度"
     
@@ -269,8 +330,19 @@ class TimeConstraintChecker:
             duration: 测试持续时间
             
         Returns:
-            float: 最优开始时间
+            float: 最优开始时间（测试无法在不跨休息日的前提下安排时为math.inf）
         """
+        config = self.config
+        key = (current_time, duration, config.hours_per_day, config.rest_day_cycle, config.short_test_threshold)
+        start_time = self._optimal_start_cache.get(key)
+        if start_time is None:
+            start_time = self._find_optimal_start_time(current_time, duration)
+            if len(self._optimal_start_cache) < self.CACHE_SIZE:
+                self._optimal_start_cache[key] = start_time
+        return start_time
+    
+    def _find_optimal_start_time(self, current_time: float, duration: float) -> float:
+        """计算最优开始时间（get_optimal_start_time未命中缓存时调用）"""
         # 如果当前时间就可以调度，直接返回
         can_schedule, _ = self.can_schedule_at_time(current_time, duration)
         if can_schedule:
@@ -282,10 +354,22 @@ class TimeConstraintChecker:
             return self.time_manager.get_next_available_time(current_time, duration)
         else:
             # 长测试项可以跨天，但不能跨休息日
-            next_time = self.time_manager.get_next_available_time(current_time)
-            
-            # 检查是否会跨休息日
-            while self.time_manager.will_cross_rest_day(next_time, duration):
-                next_time = self.time_manager.get_next_working_day_start(next_time + self.config.hours_per_day)
+            time_manager = self.time_manager
+            next_time = time_manager.get_next_available_time(current_time)
+            if not time_manager.will_cross_rest_day(next_time, duration):
+                return next_time
             
-            return next_time
\ No newline at end of file
+            # 每次尝试跳到后天开始（后天为休息日则再顺延一天），直接按天数推进：
+            # 从第day天开始时，[day, day + span] 内没有休息日即可安排
+            hours_per_day = self.config.hours_per_day
+            cycle = self.config.rest_day_cycle
+            span = int(duration / hours_per_day)
+            day = int(next_time / hours_per_day) + 1
+            # 天数按周期取模后状态重复，一个周期内找不到则永远无法安排
+            for _ in range(cycle):
+                day += 2
+                if day % cycle == 0:
+                    day += 1
+                if (day + span) // cycle == (day - 1) // cycle:
+                    return (day - 1) * hours_per_day
+            return math.inf
\ No newline at end of file